@@ -9,6 +9,7 @@ from dataclasses import dataclass
 
 from app.components.base_service import BaseService
 from app.utils.logger import get_logger
+from app.utils.yaml_utils import YamlLoader
 from app.constants import (
     WORKFLOW_TYPE_CI,
     WORKFLOW_TYPE_CD,
@@ -150,7 +151,7 @@ class Classifier(BaseService):
 
         # Parse YAML
         try:
-            workflow = yaml.safe_load(pipeline_yaml)
+            workflow = yaml.load(pipeline_yaml, Loader=YamlLoader)
             if workflow is None or not isinstance(workflow, dict):
                 logger.error("Pipeline YAML invalid or empty", correlation_id=correlation_id)
                 return self._get_default_profile()
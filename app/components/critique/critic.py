@@ -59,7 +59,8 @@ class Critic(BaseService):
             raw_output = self.llm_client.chat_completion(
                 system_prompt=CRITIC_SYSTEM_PROMPT,
                 user_prompt=user_prompt,
-                max_tokens=self.max_tokens
+                max_tokens=self.max_tokens,
+                cache_system_prompt=True
             )
             
             review = self.llm_client.parse_json_response(raw_output, correlation_id)
@@ -46,7 +46,8 @@ class Decision(BaseService):
             raw_response = self.llm_client.chat_completion(
                 system_prompt=DECISION_SYSTEM_PROMPT,
                 user_prompt=context,
-                max_tokens=self.max_tokens
+                max_tokens=self.max_tokens,
+                cache_system_prompt=True
             )
             decision = self.llm_client.parse_json_response(raw_response, cid)
             
@@ -0,0 +1,282 @@
+"""
+Analysis cache - reuses prior analyses for identical or structurally similar pipelines.
+"""
+
+import copy
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Any, NamedTuple, Optional, Tuple
+
+import yaml
+
+from app.config import config
+from app.utils.logger import get_logger
+from app.utils.yaml_utils import YamlLoader
+
+logger = get_logger(__name__, "AnalysisCache")
+
+# Keys whose values are cosmetic or repo specific and don't change the optimisation advice
+SCRUBBED_KEYS = frozenset({
+    "name",
+    "branches",
+    "branches-ignore",
+    "tags",
+    "tags-ignore",
+    "paths",
+    "paths-ignore"
+})
+
+# Keys the analysis is about; a similar pipeline only reuses an analysis if these
+# match exactly (any key containing "cache" is guarded too, e.g. bundler-cache)
+GUARDED_KEYS = frozenset({"needs", "permissions", "uses"})
+
+
+class PipelineFingerprint(NamedTuple):
+    """Cache keys for a pipeline: exact content digest, structural features, and guarded-feature digest."""
+    digest: str
+    features: Counter
+    guarded: str
+
+
+class SemanticAnalysisCache:
+    """
+    In-process cache of analysis results, matched exactly or by structural similarity.
+
+    Lookups first try an exact SHA-256 of the canonicalised pipeline (key order
+    and formatting ignored). On a miss, pipelines are reduced to a bag of
+    structural features (key paths and scalar values, with names and
+    branch/path filters scrubbed) and compared using cosine similarity, so
+    pipelines that only differ in naming, branch lists or step ordering reuse
+    the same analysis. A similar pipeline only matches if its caching, needs,
+    permissions and uses features are identical, since those are what the
+    analysis advises on. Entries expire after ttl seconds so prompt or model
+    changes are picked up.
+    """
+
+    def __init__(self, max_entries: int = 256, threshold: float = 0.95, ttl: float = 0):
+        """
+        Initialise cache.
+
+        Args:
+            max_entries: Maximum number of analyses kept (least recently used evicted)
+            threshold: Minimum cosine similarity for a cache hit (0.0 to 1.0)
+            ttl: Seconds an analysis stays valid (0 or less never expires)
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[str, PipelineFingerprint, float, float, Dict[str, Any]]]" = OrderedDict()
+        self._exact: Dict[Tuple[str, str], int] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def fingerprint(self, pipeline_yaml: str) -> Optional[PipelineFingerprint]:
+        """
+        Build the cache keys for a pipeline.
+
+        Args:
+            pipeline_yaml: Raw pipeline YAML
+
+        Returns:
+            Fingerprint, or None if the YAML can't be parsed into a mapping
+        """
+        try:
+            parsed = yaml.load(pipeline_yaml, Loader=YamlLoader)
+        except yaml.YAMLError:
+            return None
+
+        if not isinstance(parsed, dict):
+            return None
+
+        canonical = json.dumps(self._canonicalise(parsed), sort_keys=True, separators=(",", ":"))
+        features: Counter = Counter()
+        self._collect_features(parsed, "", features)
+        guarded = json.dumps(sorted(
+            (feature, count) for feature, count in features.items() if self._is_guarded(feature)
+        ))
+        return PipelineFingerprint(
+            hashlib.sha256(canonical.encode()).hexdigest(),
+            features,
+            hashlib.sha256(guarded.encode()).hexdigest()
+        )
+
+    def get(
+        self,
+        fingerprint: Optional[PipelineFingerprint],
+        namespace: str = "",
+        correlation_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find an exact or the most similar cached analysis above the threshold.
+
+        Args:
+            fingerprint: Cache keys from fingerprint()
+            namespace: Partition key (e.g. model name) so results never cross models
+            correlation_id: Request correlation ID
+
+        Returns:
+            Copy of the cached analysis, or None on miss
+        """
+        if not fingerprint or not fingerprint.features or self.max_entries <= 0:
+            return None
+
+        with self._lock:
+            self._evict_expired()
+
+            exact_id = self._exact.get((namespace, fingerprint.digest))
+            if exact_id is not None:
+                self._entries.move_to_end(exact_id)
+                analysis = self._entries[exact_id][4]
+                logger.debug("Analysis cache exact hit", correlation_id=correlation_id)
+                return copy.deepcopy(analysis)
+
+            norm = self._norm(fingerprint.features)
+            best_id, best_score = None, 0.0
+            for entry_id, (entry_ns, entry_fp, entry_norm, _, _) in self._entries.items():
+                if entry_ns != namespace or entry_fp.guarded != fingerprint.guarded:
+                    continue
+                score = self._cosine(fingerprint.features, norm, entry_fp.features, entry_norm)
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None or best_score < self.threshold:
+                logger.debug(
+                    f"Analysis cache miss (best similarity={best_score:.3f})",
+                    correlation_id=correlation_id
+                )
+                return None
+
+            self._entries.move_to_end(best_id)
+            analysis = self._entries[best_id][4]
+
+        logger.debug(
+            f"Analysis cache hit (similarity={best_score:.3f})",
+            correlation_id=correlation_id
+        )
+        return copy.deepcopy(analysis)
+
+    def put(
+        self,
+        fingerprint: Optional[PipelineFingerprint],
+        analysis: Dict[str, Any],
+        namespace: str = ""
+    ) -> None:
+        """
+        Store an analysis against its fingerprint.
+
+        Args:
+            fingerprint: Cache keys from fingerprint()
+            analysis: Parsed analysis result
+            namespace: Partition key (e.g. model name)
+        """
+        if not fingerprint or not fingerprint.features or self.max_entries <= 0:
+            return
+
+        entry = (
+            namespace,
+            fingerprint,
+            self._norm(fingerprint.features),
+            time.monotonic(),
+            copy.deepcopy(analysis)
+        )
+        with self._lock:
+            previous_id = self._exact.get((namespace, fingerprint.digest))
+            if previous_id is not None:
+                del self._entries[previous_id]
+
+            self._entries[self._next_id] = entry
+            self._exact[(namespace, fingerprint.digest)] = self._next_id
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Remove all cached analyses."""
+        with self._lock:
+            self._entries.clear()
+            self._exact.clear()
+
+    def _evict_expired(self) -> None:
+        """Drop entries older than ttl (caller holds the lock)."""
+        if self.ttl <= 0:
+            return
+        cutoff = time.monotonic() - self.ttl
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry[3] < cutoff]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        """Remove an entry and its exact-match key (caller holds the lock)."""
+        namespace, fingerprint, _, _, _ = self._entries.pop(entry_id)
+        if self._exact.get((namespace, fingerprint.digest)) == entry_id:
+            del self._exact[(namespace, fingerprint.digest)]
+
+    def _canonicalise(self, node: Any) -> Any:
+        """Convert parsed YAML into a JSON-serialisable form with string keys."""
+        if isinstance(node, dict):
+            # YAML 1.1 parses a bare 'on' key as boolean True
+            return {
+                ("on" if key is True else str(key)): self._canonicalise(value)
+                for key, value in node.items()
+            }
+        if isinstance(node, list):
+            return [self._canonicalise(item) for item in node]
+        if node is None or isinstance(node, (str, int, float, bool)):
+            return node
+        return str(node)
+
+    def _collect_features(self, node: Any, path: str, features: Counter) -> None:
+        """Recursively add key paths and scalar values to the feature bag."""
+        if isinstance(node, dict):
+            for key, value in node.items():
+                # YAML 1.1 parses a bare 'on' key as boolean True
+                key = "on" if key is True else str(key)
+                if key in SCRUBBED_KEYS:
+                    features[f"{path}/{key}"] += 1
+                    continue
+                self._collect_features(value, f"{path}/{key}", features)
+        elif isinstance(node, list):
+            for item in node:
+                self._collect_features(item, f"{path}[]", features)
+        elif isinstance(node, str):
+            # One feature per line so a single edited command doesn't drop the whole script
+            for line in node.splitlines():
+                line = line.strip()
+                if line:
+                    features[f"{path}={line}"] += 1
+        else:
+            features[f"{path}={node}"] += 1
+
+    @staticmethod
+    def _is_guarded(feature: str) -> bool:
+        """Whether a feature's key path runs through a guarded key."""
+        path = feature.split("=", 1)[0]
+        return any(
+            segment in GUARDED_KEYS or "cache" in segment.lower()
+            for segment in path.replace("[]", "").split("/")
+        )
+
+    @staticmethod
+    def _norm(features: Counter) -> float:
+        return math.sqrt(sum(count * count for count in features.values()))
+
+    @staticmethod
+    def _cosine(a: Counter, a_norm: float, b: Counter, b_norm: float) -> float:
+        if not a_norm or not b_norm:
+            return 0.0
+        if len(a) > len(b):
+            a, b = b, a
+        dot = sum(count * b.get(feature, 0) for feature, count in a.items())
+        return dot / (a_norm * b_norm)
+
+
+# Shared across Optimiser instances (the orchestrator is rebuilt per request)
+analysis_cache = SemanticAnalysisCache(
+    max_entries=config.OPTIMISER_CACHE_SIZE,
+    threshold=config.OPTIMISER_SIMILARITY_THRESHOLD,
+    ttl=config.OPTIMISER_CACHE_TTL
+)
@@ -0,0 +1,118 @@
+"""
+Optimiser helpers.
+"""
+
+import hashlib
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, Any, List, Optional, Set
+
+# Remembered issue -> fix matches, keyed by a digest of the fix set and the description
+MATCH_MEMO_SIZE = 4096
+_match_memo: "OrderedDict[bytes, int]" = OrderedDict()
+_match_memo_lock = threading.Lock()
+
+# Conservative for YAML, which tokenises denser than prose
+CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text locally, without an API call."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Return the set of 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class FixIndex:
+    """
+    Trigram index over applied fixes, for matching detected issues to their fix.
+
+    A string can only contain another if it contains all of its trigrams, so
+    the index narrows each lookup to a few candidates before the substring check.
+    Matches are memoised across instances, so repeated fix sets (e.g. shared
+    workflow templates in a batch) skip matching entirely.
+    """
+
+    def __init__(self, applied_fixes: List[Dict[str, Any]]):
+        """
+        Build index.
+
+        Args:
+            applied_fixes: Fixes from the execution stage, each with an "issue" text
+        """
+        self._fixes = applied_fixes
+        self._postings: Optional[Dict[str, List[int]]] = None
+        self._trigram_counts: List[int] = []
+        self._unindexed: List[int] = []
+
+        fix_set_hash = hashlib.blake2b(digest_size=16)
+        for fix in applied_fixes:
+            fix_set_hash.update(fix["issue"].encode())
+            fix_set_hash.update(b"\0")
+        self._fix_set_digest = fix_set_hash.digest()
+
+    def match(self, description: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the first fix whose issue text contains, or is contained in, description.
+
+        Args:
+            description: Detected issue description
+
+        Returns:
+            Matching fix, or None
+        """
+        key = hashlib.blake2b(
+            description.encode(), digest_size=16, key=self._fix_set_digest
+        ).digest()
+        with _match_memo_lock:
+            index = _match_memo.get(key)
+            if index is not None:
+                _match_memo.move_to_end(key)
+
+        if index is None:
+            index = self._find(description)
+            with _match_memo_lock:
+                _match_memo[key] = index
+                while len(_match_memo) > MATCH_MEMO_SIZE:
+                    _match_memo.popitem(last=False)
+
+        return self._fixes[index] if index >= 0 else None
+
+    def _find(self, description: str) -> int:
+        """Return the index of the first matching fix, or -1."""
+        if self._postings is None:
+            self._build()
+
+        trigrams = _trigrams(description)
+        if not trigrams:
+            candidates = set(range(len(self._fixes)))
+        else:
+            hits: Counter = Counter()
+            for trigram in trigrams:
+                hits.update(self._postings.get(trigram, ()))
+            candidates = set(self._unindexed)
+            candidates.update(
+                i for i, count in hits.items()
+                if count == self._trigram_counts[i] or count == len(trigrams)
+            )
+
+        for i in sorted(candidates):
+            fix_issue = self._fixes[i]["issue"]
+            if description in fix_issue or fix_issue in description:
+                return i
+        return -1
+
+    def _build(self) -> None:
+        """Build the trigram postings on first lookup that misses the memo."""
+        self._postings = defaultdict(list)
+        for i, fix in enumerate(self._fixes):
+            trigrams = _trigrams(fix["issue"])
+            self._trigram_counts.append(len(trigrams))
+            if not trigrams:
+                # too short to index, may be contained in any description
+                self._unindexed.append(i)
+            for trigram in trigrams:
+                self._postings[trigram].append(i)
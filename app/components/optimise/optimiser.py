@@ -2,24 +2,61 @@
 Pipeline Optimiser - Two-stage LLM based pipeline optimisation.
 """
 
-import json
+import copy
+import hashlib
+import re
 import yaml
-from typing import Dict, Any, Optional, List
+from functools import cache
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Any, Optional, List, Set, Tuple
 
 from app.components.base_service import BaseService
 from app.utils.logger import get_logger
-from app.llm.llm_client import LLMClient
+from app.utils.json_utils import dumps_pretty
+from app.utils.yaml_utils import UnsupportedStream, YamlLoader
+from app.llm.llm_client import LLMClient, extract_tagged_block
 from app.config import config
 from app.exceptions import OptimiserError
+from app.components.optimise.cache import analysis_cache
+from app.components.optimise.helper import FixIndex, estimate_tokens
 from app.components.optimise.prompt import (
-    OPTIMISER_ANALYSE_SYSTEM_PROMPT, 
-    OPTIMISER_EXECUTION_SYSTEM_PROMPT, 
+    analyse_system_prompt,
+    execution_system_prompt,
+    single_shot_system_prompt,
+    ANALYSIS_INSTRUCTION,
+    build_pipeline_block,
+    build_execution_instruction,
     build_analysis_user_prompt,
     build_execution_user_prompt
 )
 
 logger = get_logger(__name__, "Optimiser")
 
+# Keys every workflow needs, YAML 1.1 spellings of 'on' are folded to 'on' (see ON_KEY_ALIASES)
+REQUIRED_TOP_LEVEL_KEYS = ("name", "on", "jobs")
+# Header scan: a plain or quoted mapping key at the document's top-level indent
+TOP_LEVEL_KEY_PATTERN = re.compile(r'(["\']?)([A-Za-z_][\w-]*)\1[ \t]*:(?:[ \t]|$)')
+# Spellings the loader resolves to True, and so count as the 'on' key (PyYAML's
+# YAML 1.1 resolver leaves y/Y as strings)
+ON_KEY_ALIASES = frozenset({"on", "On", "ON", "yes", "Yes", "YES", "true", "True", "TRUE"})
+YAML_OPEN_TAG = "<optimised_yaml>"
+YAML_CLOSE_TAG = "</optimised_yaml>"
+
+@cache
+def system_prompt_tokens() -> int:
+    """Largest fixed prompt overhead of any stage, the pipeline YAML is sent on top of it."""
+    return max(
+        estimate_tokens(prompt) for prompt in (
+            analyse_system_prompt(),
+            execution_system_prompt(),
+            single_shot_system_prompt()
+        )
+    )
+
+
+# Validates streamed YAML while the trailing metadata is still arriving
+_validation_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="optimiser-validate")
+
 
 class Optimiser(BaseService):
     """
@@ -33,8 +70,13 @@ class Optimiser(BaseService):
         self.model = model or cfg["model"]
         self.temperature = temperature if temperature is not None else cfg["temperature"]
         self.max_tokens = max_tokens or cfg["max_tokens"]
+        self.speculative_execution = cfg.get("speculative_execution", False)
+        self.max_concurrency = cfg.get("max_concurrency", 8)
+        self.two_stage = cfg.get("two_stage", True)
+        self.max_input_tokens = cfg.get("max_input_tokens", 150000)
         
         self.llm_client = LLMClient(model=self.model, temperature=self.temperature)
+        self.analysis_cache = analysis_cache
         
         logger.debug(
             f"Initialised Optimiser: model={self.model}, "
@@ -43,79 +85,433 @@ class Optimiser(BaseService):
         )
 
     def run(self, pipeline_yaml: str, correlation_id: Optional[str] = None) -> Dict[str, Any]:
-        """Run two-stage optimisation"""
+        """Run optimisation using the configured strategy (two-stage by default)"""
+        if self.speculative_execution:
+            strategy = self._run_speculative
+        elif self.two_stage:
+            strategy = self._run_two_stage
+        else:
+            strategy = self._run_combined
+        
+        return self._optimise(pipeline_yaml, strategy, correlation_id)
+
+    def run_combined(self, pipeline_yaml: str, correlation_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run analysis and execution in a single LLM round-trip.
+        
+        Falls back to the execution stage alone when the analysis is already
+        cached. Same result shape as run().
+        """
+        return self._optimise(pipeline_yaml, self._run_combined, correlation_id)
+
+    def _optimise(
+        self,
+        pipeline_yaml: str,
+        strategy: Callable[[str, Optional[str]], Tuple[Dict[str, Any], Dict[str, Any]]],
+        correlation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Validate input, run a strategy and build the result."""
         if not pipeline_yaml or not isinstance(pipeline_yaml, str) or not pipeline_yaml.strip():
             logger.error("Invalid or empty pipeline YAML", correlation_id=correlation_id)
             raise OptimiserError("pipeline_yaml must be a non-empty string")
         
+        self._check_input_size(pipeline_yaml, correlation_id)
+        
         logger.debug("Starting optimiser", correlation_id=correlation_id)
         
         try:
-            # Stage 1: Analysis
-            analysis = self._analyse_pipeline(pipeline_yaml, correlation_id)
-            issues_count = len(analysis.get("issues", []))
-            changes_count = len(analysis.get("recommended_changes", []))
+            analysis, execution = strategy(pipeline_yaml, correlation_id)
             
-            logger.info(
-                f"Analysis complete: {issues_count} issues, {changes_count} recommendations",
+            return self._build_result(pipeline_yaml, analysis, execution, correlation_id)
+            
+        except Exception as e:
+            logger.exception(
+                f"Optimisation failed: {str(e)[:200]}",
                 correlation_id=correlation_id
             )
+            raise OptimiserError(f"Failed to optimise pipeline: {e}") from e
+
+    def run_batch(
+        self,
+        pipeline_yamls: List[str],
+        correlation_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Optimise many pipelines through the Message Batches API.
+        
+        All analysis requests are submitted as one batch, then all execution
+        requests as a second batch. Results keep the input order; a pipeline
+        that fails at any stage gets an {"error": ...} entry instead of raising.
+        
+        Args:
+            pipeline_yamls: Pipeline YAML documents to optimise
+            correlation_id: Request correlation ID
             
-            if issues_count > 0:
-                logger.debug(
-                    f"Issues detected: {json.dumps(analysis.get('issues', []), indent=2)}",
-                    correlation_id=correlation_id
-                )
+        Returns:
+            One result per input, shaped like run() or {"error": message}
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(pipeline_yamls)
+        analyses: Dict[int, Dict[str, Any]] = {}
+        analysis_requests = []
+        fingerprints_by_index = {}
+        
+        # Identical YAMLs (shared workflow templates) are optimised once and fanned out
+        first_index_by_digest: Dict[bytes, int] = {}
+        duplicate_of: Dict[int, int] = {}
+        for i, pipeline_yaml in enumerate(pipeline_yamls):
+            if isinstance(pipeline_yaml, str):
+                digest = hashlib.blake2b(pipeline_yaml.encode(), digest_size=16).digest()
+                first = first_index_by_digest.setdefault(digest, i)
+                if first != i:
+                    duplicate_of[i] = first
+        
+        for i, pipeline_yaml in enumerate(pipeline_yamls):
+            if i in duplicate_of:
+                continue
             
-            # Stage 2: Execution
-            execution = self._execute_optimisations(pipeline_yaml, analysis, correlation_id)
-            fixes_count = len(execution.get("applied_fixes", []))
+            if not pipeline_yaml or not isinstance(pipeline_yaml, str) or not pipeline_yaml.strip():
+                results[i] = {"error": "pipeline_yaml must be a non-empty string"}
+                continue
             
-            # Validate generated YAML
-            self._validate_yaml(execution["optimised_yaml"], correlation_id)
+            try:
+                self._check_input_size(pipeline_yaml, correlation_id)
+            except OptimiserError as e:
+                results[i] = {"error": str(e)}
+                continue
             
-            if fixes_count > 0:
-                logger.debug(
-                    f"Applied fixes: {json.dumps(execution.get('applied_fixes', []), indent=2)}",
-                    correlation_id=correlation_id
+            fingerprints_by_index[i] = self.analysis_cache.fingerprint(pipeline_yaml)
+            cached = self.analysis_cache.get(
+                fingerprints_by_index[i], namespace=self.model, correlation_id=correlation_id
+            )
+            if cached is not None:
+                analyses[i] = cached
+            else:
+                analysis_requests.append((
+                    f"analyse-{i}",
+                    analyse_system_prompt(),
+                    build_analysis_user_prompt(pipeline_yaml)
+                ))
+        
+        logger.info(
+            f"Starting batch optimisation: {len(pipeline_yamls)} pipelines "
+            f"({len(duplicate_of)} duplicates), {len(analysis_requests)} analysis requests",
+            correlation_id=correlation_id
+        )
+        
+        # Stage 1: Analysis batch
+        raw_analyses = self.llm_client.batch_completion(
+            analysis_requests,
+            max_tokens=self.max_tokens,
+            cache_system_prompt=True,
+            correlation_id=correlation_id
+        )
+        for custom_id, _, _ in analysis_requests:
+            i = int(custom_id.split("-", 1)[1])
+            try:
+                if custom_id not in raw_analyses:
+                    raise OptimiserError("No analysis response returned")
+                analyses[i] = self._parse_analysis(raw_analyses[custom_id], correlation_id)
+                self.analysis_cache.put(fingerprints_by_index[i], analyses[i], namespace=self.model)
+            except Exception as e:
+                results[i] = {"error": f"Analysis stage failed: {e}"}
+        
+        # Stage 2: Execution batch (pipelines with nothing to change skip it)
+        execution_requests = []
+        for i, analysis in sorted(analyses.items()):
+            if not analysis.get("recommended_changes"):
+                results[i] = self._build_result(
+                    pipeline_yamls[i], analysis, self._unchanged_execution(pipeline_yamls[i]), correlation_id
                 )
+                continue
+            execution_requests.append((
+                f"execute-{i}",
+                execution_system_prompt(),
+                build_execution_user_prompt(pipeline_yamls[i], analysis)
+            ))
+        raw_executions = self.llm_client.batch_completion(
+            execution_requests,
+            max_tokens=self.max_tokens,
+            cache_system_prompt=True,
+            correlation_id=correlation_id
+        )
+        for custom_id, _, _ in execution_requests:
+            i = int(custom_id.split("-", 1)[1])
+            try:
+                if custom_id not in raw_executions:
+                    raise OptimiserError("No execution response returned")
+                execution = self._parse_execution(raw_executions[custom_id], correlation_id)
+                self._validate_yaml(execution["optimised_yaml"], correlation_id)
+                results[i] = self._build_result(pipeline_yamls[i], analyses[i], execution, correlation_id)
+            except Exception as e:
+                results[i] = {"error": f"Execution stage failed: {e}"}
+        
+        for i, first in duplicate_of.items():
+            results[i] = copy.deepcopy(results[first])
+        
+        failed = sum(1 for result in results if "error" in result)
+        logger.info(
+            f"Batch optimisation complete: {len(results) - failed} succeeded, {failed} failed",
+            correlation_id=correlation_id
+        )
+        
+        return results
+
+    def run_concurrent(
+        self,
+        pipeline_yamls: List[str],
+        correlation_id: Optional[str] = None,
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Optimise many pipelines with a bounded number of concurrent run() calls.
+        
+        For accounts without Message Batches API access. At most max_concurrency
+        pipelines are in flight at once; results keep the input order and a
+        pipeline that fails gets an {"error": ...} entry instead of raising.
+        
+        Args:
+            pipeline_yamls: Pipeline YAML documents to optimise
+            correlation_id: Request correlation ID
+            max_concurrency: In-flight limit (defaults to OPTIMISER_MAX_CONCURRENCY)
+            
+        Returns:
+            One result per input, shaped like run() or {"error": message}
+        """
+        if not pipeline_yamls:
+            return []
+        
+        depth = max(1, min(max_concurrency or self.max_concurrency, len(pipeline_yamls)))
+        logger.info(
+            f"Starting concurrent optimisation: {len(pipeline_yamls)} pipelines, concurrency={depth}",
+            correlation_id=correlation_id
+        )
+        
+        def run_one(pipeline_yaml: str) -> Dict[str, Any]:
+            try:
+                return self.run(pipeline_yaml, correlation_id)
+            except OptimiserError as e:
+                return {"error": str(e)}
+        
+        with ThreadPoolExecutor(max_workers=depth, thread_name_prefix="optimiser-batch") as executor:
+            results = list(executor.map(run_one, pipeline_yamls))
+        
+        failed = sum(1 for result in results if "error" in result)
+        logger.info(
+            f"Concurrent optimisation complete: {len(results) - failed} succeeded, {failed} failed",
+            correlation_id=correlation_id
+        )
+        
+        return results
+
+    def run_many(
+        self,
+        pipelines: List[Tuple[str, str]],
+        correlation_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Optimise several workflow files (e.g. all of a repository's workflows) concurrently.
+        
+        Args:
+            pipelines: (pipeline_path, pipeline_yaml) pairs
+            correlation_id: Request correlation ID
             
+        Returns:
+            One result per pair, in order, shaped like run_concurrent() plus "pipeline_path"
+        """
+        results = self.run_concurrent([pipeline_yaml for _, pipeline_yaml in pipelines], correlation_id)
+        return [
+            {"pipeline_path": pipeline_path, **result}
+            for (pipeline_path, _), result in zip(pipelines, results)
+        ]
+
+    def _check_input_size(self, pipeline_yaml: str, correlation_id: Optional[str] = None) -> None:
+        """Reject pipelines whose estimated prompt size exceeds max_input_tokens before any LLM call."""
+        estimated = system_prompt_tokens() + estimate_tokens(pipeline_yaml)
+        if estimated > self.max_input_tokens:
+            logger.error(
+                f"Pipeline too large: ~{estimated} input tokens (limit {self.max_input_tokens})",
+                correlation_id=correlation_id
+            )
+            raise OptimiserError(
+                f"Pipeline YAML too large to optimise: ~{estimated} estimated input tokens "
+                f"exceeds limit of {self.max_input_tokens} ({len(pipeline_yaml)} characters)"
+            )
+
+    def _build_result(
+        self,
+        pipeline_yaml: str,
+        analysis: Dict[str, Any],
+        execution: Dict[str, Any],
+        correlation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Assemble the optimisation result from validated analysis and execution output."""
+        issues_count = len(analysis.get("issues", []))
+        fixes_count = len(execution.get("applied_fixes", []))
+        
+        if fixes_count > 0:
             logger.debug(
-                f"Original YAML:\n{pipeline_yaml}\n\nOptimised YAML:\n{execution['optimised_yaml']}",
+                f"Applied fixes: {dumps_pretty(execution.get('applied_fixes', []))}",
                 correlation_id=correlation_id
             )
-            
-            expected_improvement = self._calculate_improvement(
-                analysis.get("issues", []),
-                execution.get("applied_fixes", [])
+        
+        logger.debug(
+            f"Original YAML:\n{pipeline_yaml}\n\nOptimised YAML:\n{execution['optimised_yaml']}",
+            correlation_id=correlation_id
+        )
+        
+        expected_improvement = self._calculate_improvement(
+            analysis.get("issues", []),
+            execution.get("applied_fixes", [])
+        )
+        
+        result = {
+            "optimised_yaml": execution["optimised_yaml"],
+            "issues_detected": analysis.get("issues", []),
+            "applied_fixes": execution.get("applied_fixes", []),
+            "expected_improvement": expected_improvement,
+            "analysis": analysis,
+            "is_fixable": len(execution.get("applied_fixes", [])) > 0
+        }
+        
+        logger.info(
+            f"Execution complete: {fixes_count} fixes applied",
+            correlation_id=correlation_id
+        )
+        logger.info(
+            f"Optimisation complete: {issues_count} issues -> {fixes_count} fixes applied",
+            correlation_id=correlation_id
+        )
+        
+        return result
+
+    def _run_two_stage(
+        self,
+        pipeline_yaml: str,
+        correlation_id: Optional[str] = None,
+        analysis: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Run analysis then execution as two LLM calls and validate the output."""
+        # Stage 1: Analysis (skipped when the caller already has one)
+        if analysis is None:
+            analysis = self._analyse_pipeline(pipeline_yaml, correlation_id)
+        issues_count = len(analysis.get("issues", []))
+        changes_count = len(analysis.get("recommended_changes", []))
+        
+        logger.info(
+            f"Analysis complete: {issues_count} issues, {changes_count} recommendations",
+            correlation_id=correlation_id
+        )
+        
+        if issues_count > 0:
+            logger.debug(
+                f"Issues detected: {dumps_pretty(analysis.get('issues', []))}",
+                correlation_id=correlation_id
             )
-            
-            result = {
-                "optimised_yaml": execution["optimised_yaml"],
-                "issues_detected": analysis.get("issues", []),
-                "applied_fixes": execution.get("applied_fixes", []),
-                "expected_improvement": expected_improvement,
-                "analysis": analysis,
-                "is_fixable": len(execution.get("applied_fixes", [])) > 0
-            }
-            
+        
+        if not analysis.get("recommended_changes"):
             logger.info(
-                f"Execution complete: {fixes_count} fixes applied",
+                "No changes recommended, skipping execution stage",
                 correlation_id=correlation_id
             )
+            return analysis, self._unchanged_execution(pipeline_yaml)
+        
+        # Stage 2: Execution (generated YAML is validated while metadata streams)
+        execution = self._execute_optimisations(pipeline_yaml, analysis, correlation_id, validate=True)
+        
+        return analysis, execution
+
+    def _run_combined(
+        self,
+        pipeline_yaml: str,
+        correlation_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Run a single combined LLM call, or only the execution stage on an analysis cache hit.
+        """
+        fingerprint = self.analysis_cache.fingerprint(pipeline_yaml)
+        cached = self.analysis_cache.get(fingerprint, namespace=self.model, correlation_id=correlation_id)
+        if cached is not None:
             logger.info(
-                f"Optimisation complete: {issues_count} issues -> {fixes_count} fixes applied",
+                "Reusing cached analysis, running execution stage only",
                 correlation_id=correlation_id
             )
+            return self._run_two_stage(pipeline_yaml, correlation_id, analysis=cached)
+        
+        analysis, execution = self._run_single_shot(pipeline_yaml, correlation_id)
+        self.analysis_cache.put(fingerprint, analysis, namespace=self.model)
+        return analysis, execution
+
+    def _run_single_shot(
+        self,
+        pipeline_yaml: str,
+        correlation_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Run analysis and execution in a single LLM call and validate the output."""
+        try:
+            raw_result = self._call_llm(
+                system_prompt=single_shot_system_prompt(),
+                user_prompt=ANALYSIS_INSTRUCTION,
+                correlation_id=correlation_id,
+                user_prefix=build_pipeline_block(pipeline_yaml)
+            )
             
-            return result
+            analysis_text = extract_tagged_block(raw_result, "analysis")
+            if analysis_text is None:
+                raise OptimiserError("Single-shot response missing <analysis> section")
             
+            analysis = self._parse_analysis(analysis_text, correlation_id)
+            execution = self._parse_execution(raw_result, correlation_id)
+            if not execution.get("optimised_yaml"):
+                raise OptimiserError("Execution response missing optimised_yaml")
         except Exception as e:
-            logger.exception(
-                f"Optimisation failed: {str(e)[:200]}",
-                correlation_id=correlation_id
-            )
-            raise OptimiserError(f"Failed to optimise pipeline: {e}") from e
+            raise OptimiserError(f"Single-shot optimisation failed: {e}") from e
+        
+        self._validate_yaml(execution["optimised_yaml"], correlation_id)
+        
+        return analysis, execution
+
+    def _run_speculative(
+        self,
+        pipeline_yaml: str,
+        correlation_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Race the two-stage path against a single-shot call.
+        
+        Both run concurrently; the first one to produce validated YAML wins and
+        the other is abandoned.
+        """
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="optimiser")
+        strategies = {
+            executor.submit(self._run_two_stage, pipeline_yaml, correlation_id): "two-stage",
+            executor.submit(self._run_single_shot, pipeline_yaml, correlation_id): "single-shot"
+        }
+        errors = []
+        
+        try:
+            pending = set(strategies)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        analysis, execution = future.result()
+                    except Exception as e:
+                        errors.append(f"{strategies[future]}: {e}")
+                        logger.warning(
+                            f"Speculative {strategies[future]} path failed: {str(e)[:200]}",
+                            correlation_id=correlation_id
+                        )
+                        continue
+                    
+                    logger.info(
+                        f"Using {strategies[future]} optimisation result",
+                        correlation_id=correlation_id
+                    )
+                    return analysis, execution
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        raise OptimiserError(f"All optimisation strategies failed: {'; '.join(errors)}")
 
     def _execute(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Execute within workflow."""
@@ -165,96 +561,346 @@ class Optimiser(BaseService):
         correlation_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Analyse pipeline using LLM
+        Analyse pipeline using LLM, reusing a cached analysis for identical or structurally similar pipelines
         """
-        user_prompt = build_analysis_user_prompt(pipeline_yaml)
+        fingerprint = self.analysis_cache.fingerprint(pipeline_yaml)
+        cached = self.analysis_cache.get(fingerprint, namespace=self.model, correlation_id=correlation_id)
+        if cached is not None:
+            logger.info(
+                "Reusing cached analysis for structurally similar pipeline",
+                correlation_id=correlation_id
+            )
+            return cached
         
         try:
             raw_result = self._call_llm(
-                system_prompt=OPTIMISER_ANALYSE_SYSTEM_PROMPT,
-                user_prompt=user_prompt,
-                correlation_id=correlation_id
+                system_prompt=analyse_system_prompt(),
+                user_prompt=ANALYSIS_INSTRUCTION,
+                correlation_id=correlation_id,
+                user_prefix=build_pipeline_block(pipeline_yaml)
             )
             
-            analysis = self.llm_client.parse_json_response(raw_result, correlation_id)
-            
-            if "issues" not in analysis or "recommended_changes" not in analysis:
-                raise OptimiserError(
-                    "Analysis response missing required fields (issues or recommended_changes)"
-                )
+            analysis = self._parse_analysis(raw_result, correlation_id)
             
+            self.analysis_cache.put(fingerprint, analysis, namespace=self.model)
             return analysis
         except Exception as e:
             raise OptimiserError(f"Analysis stage failed: {e}") from e
 
+    def _parse_analysis(self, raw_result: str, correlation_id: Optional[str] = None) -> Dict[str, Any]:
+        """Parse and check the analysis stage response."""
+        analysis = self.llm_client.parse_json_response(raw_result, correlation_id)
+        
+        if "issues" not in analysis or "recommended_changes" not in analysis:
+            raise OptimiserError(
+                "Analysis response missing required fields (issues or recommended_changes)"
+            )
+        
+        return analysis
+
     def _execute_optimisations(
         self, 
         pipeline_yaml: str, 
         analysis: Dict[str, Any], 
-        correlation_id: Optional[str] = None
+        correlation_id: Optional[str] = None,
+        validate: bool = False
     ) -> Dict[str, Any]:
-        """Execute optimisations using custom XML parser for YAML output."""
-        user_prompt = build_execution_user_prompt(pipeline_yaml, analysis)
+        """
+        Execute optimisations using custom XML parser for YAML output.
+        
+        With validate=True the response is streamed and the generated YAML is
+        validated as soon as its closing tag arrives, overlapping validation
+        with the remaining metadata output.
+        """
+        early_validation: Dict[str, Any] = {}
         
         try:
             raw_result = self._call_llm(
-                system_prompt=OPTIMISER_EXECUTION_SYSTEM_PROMPT,
-                user_prompt=user_prompt,
-                correlation_id=correlation_id
+                system_prompt=execution_system_prompt(),
+                user_prompt=build_execution_instruction(analysis),
+                correlation_id=correlation_id,
+                user_prefix=build_pipeline_block(pipeline_yaml),
+                on_text=self._early_yaml_validator(early_validation, correlation_id) if validate else None
             )
             
-            execution = self.llm_client.parse_optimiser_response(raw_result, correlation_id)
+            execution = self._parse_execution(raw_result, correlation_id)
+        except Exception as e:
+            raise OptimiserError(f"Execution stage failed: {e}") from e
+        
+        if validate:
+            future: Optional[Future] = early_validation.get("future")
+            if future is not None and early_validation["yaml"] == execution["optimised_yaml"]:
+                future.result()
+            else:
+                self._validate_yaml(execution["optimised_yaml"], correlation_id)
+        
+        return execution
+
+    @staticmethod
+    def _unchanged_execution(pipeline_yaml: str) -> Dict[str, Any]:
+        """Execution result for a pipeline the analysis found nothing to change in."""
+        return {
+            "optimised_yaml": pipeline_yaml,
+            "applied_fixes": [],
+            "verification": "No changes recommended, original pipeline kept"
+        }
+
+    def _early_yaml_validator(
+        self,
+        early_validation: Dict[str, Any],
+        correlation_id: Optional[str] = None
+    ) -> Callable[[str], None]:
+        """
+        Build a streaming callback that dispatches _validate_yaml once the YAML block closes.
+        
+        The submitted YAML and its future are stored in early_validation.
+        """
+        scan_from = 0
+        
+        def on_text(buffer: str) -> None:
+            nonlocal scan_from
+            if "future" in early_validation:
+                return
             
-            if "optimised_yaml" not in execution:
-                raise OptimiserError("Execution response missing optimised_yaml")
+            # Only rescan the tail that could contain a newly completed closing tag
+            end = buffer.find(YAML_CLOSE_TAG, scan_from)
+            if end == -1:
+                scan_from = max(0, len(buffer) - len(YAML_CLOSE_TAG))
+                return
             
-            if "applied_fixes" not in execution:
-                logger.warning(
-                    "Execution response missing applied_fixes field",
-                    correlation_id=correlation_id
-                )
-                execution["applied_fixes"] = []
+            start = buffer.find(YAML_OPEN_TAG)
+            if start == -1 or start > end:
+                return
             
-            return execution
-        except Exception as e:
-            raise OptimiserError(f"Execution stage failed: {e}") from e
+            yaml_content = buffer[start + len(YAML_OPEN_TAG):end].strip()
+            early_validation["yaml"] = yaml_content
+            early_validation["future"] = _validation_executor.submit(
+                self._validate_yaml, yaml_content, correlation_id
+            )
+            logger.debug(
+                "Optimised YAML complete, validating while metadata streams",
+                correlation_id=correlation_id
+            )
+        
+        return on_text
+
+    def _parse_execution(self, raw_result: str, correlation_id: Optional[str] = None) -> Dict[str, Any]:
+        """Parse and check the execution stage response."""
+        execution = self.llm_client.parse_optimiser_response(raw_result, correlation_id)
+        
+        if "optimised_yaml" not in execution:
+            raise OptimiserError("Execution response missing optimised_yaml")
+        
+        if "applied_fixes" not in execution:
+            logger.warning(
+                "Execution response missing applied_fixes field",
+                correlation_id=correlation_id
+            )
+            execution["applied_fixes"] = []
+        
+        return execution
 
     def _call_llm(
         self, 
         system_prompt: str, 
         user_prompt: str, 
-        correlation_id: Optional[str] = None
+        correlation_id: Optional[str] = None,
+        user_prefix: Optional[str] = None,
+        on_text: Optional[Callable[[str], None]] = None
     ) -> str:
-        """Call LLM using regular chat completion (no structured output)."""
-        return self.llm_client.chat_completion(
+        """
+        Call LLM using regular chat completion (no structured output).
+        
+        When on_text is given the response is streamed and on_text is called
+        with the accumulated text after every chunk.
+        """
+        if on_text is None:
+            return self.llm_client.chat_completion(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                max_tokens=self.max_tokens,
+                cache_system_prompt=True,
+                user_prefix=user_prefix
+            )
+        
+        buffer = ""
+        for text in self.llm_client.stream_completion(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
-            max_tokens=self.max_tokens
-        )
+            max_tokens=self.max_tokens,
+            cache_system_prompt=True,
+            user_prefix=user_prefix
+        ):
+            buffer += text
+            on_text(buffer)
+        
+        return buffer
 
     def _validate_yaml(self, yaml_content: str, correlation_id: Optional[str] = None) -> None:
         """Validate optimised YAML."""
+        missing_key = self._find_missing_header_key(yaml_content)
+        if missing_key:
+            raise OptimiserError(
+                f"Optimised YAML missing required top-level key: '{missing_key}'"
+            )
+        
         try:
-            parsed_yaml = yaml.safe_load(yaml_content)
+            try:
+                keys, jobs_defined = self._scan_top_level(yaml_content)
+            except UnsupportedStream:
+                keys, jobs_defined = self._load_top_level(yaml_content)
         except yaml.YAMLError as e:
             logger.error(f"Optimised YAML is invalid: {e}", correlation_id=correlation_id)
             raise OptimiserError(f"Optimised YAML is invalid: {e}") from e
         
-        required_top_level = {
-            "name": ["name"],
-            "on": ["on", True],
-            "jobs": ["jobs"]
-        }
-        
-        for key_name, acceptable_keys in required_top_level.items():
-            if not any(k in parsed_yaml for k in acceptable_keys):
+        for key_name in REQUIRED_TOP_LEVEL_KEYS:
+            if key_name not in keys:
                 raise OptimiserError(
                     f"Optimised YAML missing required top-level key: '{key_name}'"
                 )
         
-        if not parsed_yaml.get("jobs"):
+        if not jobs_defined:
             raise OptimiserError("Optimised YAML has no jobs defined")
 
+    @staticmethod
+    def _scan_top_level(yaml_content: str) -> Tuple[Set[str], bool]:
+        """
+        Walk the YAML event stream for top-level keys without constructing Python objects.
+        
+        The whole stream is parsed, so syntax errors anywhere still raise; the
+        undefined alias, unknown tag, unhashable key and multi-document checks
+        of a full load are kept.
+        
+        Raises:
+            UnsupportedStream: If a top-level key or value is a merge key or an
+                alias, whose keys or contents only a full load resolves
+        
+        Returns:
+            (top-level key names with YAML 1.1 'on' aliases folded to 'on',
+            whether the last 'jobs' value is a non-empty mapping)
+        """
+        keys = set()
+        anchors = set()
+        jobs_defined = False
+        jobs_opened = False  # the 'jobs' collection just started, its first child decides emptiness
+        documents = 0
+        root_is_mapping = False
+        value_of = None      # top-level key whose value is being read
+        # One [is_mapping, expect_key] entry per open collection
+        open_collections = []
+        
+        for event in yaml.parse(yaml_content, Loader=YamlLoader):
+            if isinstance(event, yaml.DocumentStartEvent):
+                documents += 1
+                if documents > 1:
+                    raise yaml.YAMLError("expected a single document in the stream")
+                continue
+            
+            if jobs_opened:
+                jobs_defined = isinstance(event, yaml.NodeEvent)
+                jobs_opened = False
+            
+            if isinstance(event, yaml.CollectionEndEvent):
+                open_collections.pop()
+                if open_collections:
+                    open_collections[-1][1] = not open_collections[-1][1]
+                continue
+            if not isinstance(event, yaml.NodeEvent):
+                continue
+            
+            if isinstance(event, yaml.AliasEvent):
+                if event.anchor not in anchors:
+                    raise yaml.YAMLError(f"found undefined alias '{event.anchor}'")
+            else:
+                if event.anchor:
+                    anchors.add(event.anchor)
+                if event.tag and event.tag != "!" and event.tag not in YamlLoader.yaml_constructors:
+                    raise yaml.YAMLError(f"could not determine a constructor for the tag '{event.tag}'")
+            
+            is_collection = isinstance(event, yaml.CollectionStartEvent)
+            if not open_collections:
+                # Keep reading a non-mapping root so syntax errors still take precedence
+                root_is_mapping = isinstance(event, yaml.MappingStartEvent)
+            else:
+                parent = open_collections[-1]
+                is_key = parent[0] and parent[1]
+                if is_key and is_collection:
+                    raise yaml.YAMLError("found unhashable key")
+                
+                if len(open_collections) == 1:
+                    if isinstance(event, yaml.AliasEvent):
+                        raise UnsupportedStream("alias at the top level")
+                    if is_key and isinstance(event, yaml.ScalarEvent) and (
+                        event.tag == "tag:yaml.org,2002:merge" or event.implicit[0] and event.value == "<<"
+                    ):
+                        raise UnsupportedStream("merge key at the top level")
+                    if is_key:
+                        value_of = None
+                        if isinstance(event, yaml.ScalarEvent):
+                            # A plain 'on' loads as boolean True under YAML 1.1
+                            on_alias = event.implicit[0] and event.value in ON_KEY_ALIASES
+                            value_of = "on" if on_alias else event.value
+                            keys.add(value_of)
+                    elif value_of == "jobs":
+                        jobs_defined = False
+                        jobs_opened = isinstance(event, yaml.MappingStartEvent)
+                
+                if not is_collection:
+                    parent[1] = not parent[1]
+            
+            if is_collection:
+                open_collections.append([isinstance(event, yaml.MappingStartEvent), True])
+        
+        if not root_is_mapping:
+            raise OptimiserError("Optimised YAML must be a mapping of top-level keys")
+        return keys, jobs_defined
+
+    @staticmethod
+    def _load_top_level(yaml_content: str) -> Tuple[Set[Any], bool]:
+        """Full-load fallback for _scan_top_level, same return shape."""
+        parsed = yaml.load(yaml_content, Loader=YamlLoader)
+        if not isinstance(parsed, dict):
+            raise OptimiserError("Optimised YAML must be a mapping of top-level keys")
+        keys = {"on" if key is True else key for key in parsed}
+        jobs = parsed.get("jobs")
+        return keys, isinstance(jobs, dict) and bool(jobs)
+
+    @staticmethod
+    def _find_missing_header_key(yaml_content: str) -> Optional[str]:
+        """
+        Scan top-level keys line by line to reject YAML missing a required key without parsing it.
+        
+        Returns the first missing key name, or None when every key is present or
+        the layout (flow style, anchors, tabs, multiple documents) needs the full parser.
+        """
+        found = set()
+        base_indent = None
+        
+        for line in yaml_content.splitlines():
+            stripped = line.lstrip(" ")
+            if not stripped or stripped.startswith("#"):
+                continue
+            
+            indent = len(line) - len(stripped)
+            if base_indent is None:
+                base_indent = indent
+            if indent > base_indent:
+                continue
+            if indent < base_indent:
+                return None
+            
+            match = TOP_LEVEL_KEY_PATTERN.match(stripped)
+            if not match:
+                return None
+            key = match.group(2)
+            found.add("on" if key in ON_KEY_ALIASES else key)
+            if found.issuperset(REQUIRED_TOP_LEVEL_KEYS):
+                return None
+        
+        if base_indent is None:
+            return None
+        return next(key_name for key_name in REQUIRED_TOP_LEVEL_KEYS if key_name not in found)
+
     def _calculate_improvement(
         self, 
         issues: List[Dict[str, Any]], 
@@ -264,8 +910,10 @@ class Optimiser(BaseService):
         time_saved = "0 minutes per run"
         cost = "None"
         
-        has_caching = any("cach" in str(fix).lower() for fix in applied_fixes)
-        has_parallel = any("parallel" in str(fix).lower() for fix in applied_fixes)
+        # newline separator stops a keyword matching across two fixes
+        fixes_text = "\n".join(str(fix) for fix in applied_fixes).lower()
+        has_caching = "cach" in fixes_text
+        has_parallel = "parallel" in fixes_text
         
         if has_caching and has_parallel:
             time_saved = "3-5 minutes per run"
@@ -304,13 +952,12 @@ class Optimiser(BaseService):
         issues_detected = result.get("issues_detected", [])
         applied_fixes = result.get("applied_fixes", [])
         
+        fix_index = FixIndex(applied_fixes)
+        
         issues = []
         for issue in issues_detected:
-            fix_text = "TBD"
-            for fix in applied_fixes:
-                if issue["description"] in fix["issue"] or fix["issue"] in issue["description"]:
-                    fix_text = fix["fix"]
-                    break
+            fix = fix_index.match(issue["description"])
+            fix_text = fix["fix"] if fix else "TBD"
             
             issues.append({
                 "type": issue.get("type", "optimisation"),
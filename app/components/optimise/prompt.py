@@ -1,149 +1,81 @@
 
-import json
-from typing import Dict, Any
-
-
-OPTIMISER_ANALYSE_SYSTEM_PROMPT = """You are a CI/CD pipeline optimisation expert. Analyze this GitHub Actions workflow and create a detailed optimisation plan.
-  Identify issues in these categories:
-  1. **Caching**: Missing dependency caching (npm, pip, etc.)
-  2. **Parallelisation**: Jobs that could run in parallel but have unnecessary dependencies
-  3. **Redundant Steps**: Unnecessary or duplicate steps
-  4. **Resource Efficiency**: Inefficient configurations
-
-  **CRITICAL RULES FOR DEPENDENCY REMOVAL:**
-  - NEVER remove dependencies for deployment, release, or production jobs
-  - NEVER remove dependencies where Job A produces artifacts that Job B consumes
-  - NEVER remove dependencies that enforce critical workflow ordering (build -> test -> deploy)
-  - ONLY suggest removing dependencies when jobs are truly independent and can safely run in parallel
-  - When in doubt, DO NOT remove the dependency
-
-  **Safe to parallelise:**
-  - Independent test suites (unit tests, integration tests, linting) that don't depend on each other
-  - Multiple build jobs for different platforms/environments
-  - Documentation generation and code quality checks
-
-  **NEVER parallelise:**
-  - Build -> Deploy
-  - Test -> Deploy
-  - Build -> Release
-  - Any job with "deploy", "release", "publish", or "production" in the name should keep all dependencies
-
-  Return a JSON object:
-  {
-    "issues": [
-      {
-        "type": "caching|parallelisation|redundant|other",
-        "severity": "high|medium|low",
-        "description": "clear description of the issue",
-        "location": "job_name or job_name.step_index"
-      }
-    ],
-    "recommended_changes": [
-      {
-        "change_type": "add_cache|remove_dependency|delete_step|modify_config",
-        "target": "specific job or step location",
-        "rationale": "why this change improves the pipeline",
-        "details": "what specifically to change (brief, no code examples)",
-        "safety_note": "confirm this change is safe and won't break workflow ordering"
-      }
-    ]
-  }
-
-  **CRITICAL: Return ONLY valid JSON. Do NOT include code examples, YAML snippets, or multi-line strings in the JSON.**
-
-  Be specific and actionable. Only recommend changes you're confident will improve the pipeline WITHOUT breaking correctness.
-  Prioritise caching improvements over dependency removal.
-"""
+from functools import cache
+from importlib.resources import files
+from typing import Any, Dict, Final
+
+from app.utils.json_utils import dumps_pretty
+
+
+# System prompts live in prompts/*.txt and are read once on first use
+PROMPTS_PACKAGE: Final[str] = "app.components.optimise.prompts"
+
+
+def _load_prompt(file_name: str) -> str:
+    """Read a prompt resource shipped alongside this module."""
+    return files(PROMPTS_PACKAGE).joinpath(file_name).read_text(encoding="utf-8")
+
+
+@cache
+def analyse_system_prompt() -> str:
+    """System prompt for the analysis stage."""
+    return _load_prompt("analyse.txt")
+
+
+@cache
+def execution_system_prompt() -> str:
+    """System prompt for the execution stage."""
+    return _load_prompt("execute.txt")
+
+
+@cache
+def single_shot_system_prompt() -> str:
+    """System prompt for combined analysis and execution in one call."""
+    return _load_prompt("single_shot.txt")
+
 
+ANALYSIS_INSTRUCTION: Final[str] = "Analyse this GitHub Actions pipeline."
 
-OPTIMISER_EXECUTION_SYSTEM_PROMPT = """You are implementing an optimisation plan for a GitHub Actions workflow.
-
-  **Your Task:**
-  1. Read the original YAML and the change plan
-  2. Apply ONLY the changes specified in the plan
-  3. Generate complete, valid, runnable YAML
-  4. Verify each change is actually present in your output
-
-  **Critical Rules:**
-  - Preserve all original functionality
-  - Keep all top-level keys (name, on, jobs)
-  - Each job runs in isolation - don't remove checkouts unless the job truly doesn't need code
-  - When adding caching, insert the cache step BEFORE the install/setup step (not after)
-  - When removing dependencies, DOUBLE-CHECK that the jobs are truly independent
-  - NEVER remove dependencies from deployment, release, or production jobs
-  - Generate the complete YAML, not snippets
-
-  **Dependency Removal Safety Check:**
-  Before removing any "needs" dependency, verify:
-  1. The downstream job doesn't consume artifacts from the upstream job
-  2. The jobs don't have a logical ordering requirement (e.g., test before deploy)
-  3. The downstream job is not a deployment/release/production job
-  4. Both jobs can truly run in parallel without issues
-
-  **Cache Key Pattern Rules:**
-  - Use exact file paths when possible (e.g., "requirements.txt" not "**/requirements*.txt")
-  - For multiple locations, use explicit patterns: "requirements.txt" or "*/requirements.txt"
-  - Verify cache key patterns will actually match the files
-
-  **CRITICAL OUTPUT FORMAT:**
-  You MUST format your response exactly as shown below, using XML-style tags to separate the YAML from metadata.
-  This format is REQUIRED because embedding large YAML in JSON causes parsing errors.
-
-  <optimised_yaml>
-  # Place the complete optimised YAML here
-  # Do not escape or modify the YAML - just paste it directly
-  name: Your Pipeline Name
-  on:
-    push:
-      branches: [main]
-  jobs:
-    # ... complete pipeline YAML
-  </optimised_yaml>
-
-  <metadata>
-  {
-    "applied_fixes": [
-      {
-        "issue": "brief description matching an issue from the plan",
-        "fix": "what was actually changed",
-        "location": "where the change was made"
-      }
-    ],
-    "verification": "brief confirmation that changes were applied correctly and safely"
-  }
-  </metadata>
-
-  **IMPORTANT:**
-  - The YAML goes inside <optimised_yaml> tags WITHOUT any escaping
-  - The metadata goes inside <metadata> tags as valid JSON
-  - Only include fixes in "applied_fixes" that are actually present in the YAML
-  - If a recommended change would break workflow safety, SKIP it and note in verification
+# %-style templates, filled by the builders below
+PIPELINE_BLOCK_TEMPLATE: Final[str] = "Original Pipeline:\n```yaml\n%s\n```"
+
+EXECUTION_INSTRUCTION_TEMPLATE: Final[str] = """Analysis Results:
+%s
+
+Apply the recommended changes from the analysis to generate an optimised pipeline.
+
+Remember to format your response using the XML-style tags:
+<optimised_yaml>
+... your optimised YAML here ...
+</optimised_yaml>
+
+<metadata>
+... your JSON metadata here ...
+</metadata>
 """
 
+USER_PROMPT_TEMPLATE: Final[str] = "%s\n\n%s"
 
-def build_analysis_user_prompt(pipeline_yaml: str) -> str:
-    """Build user prompt for analysis stage."""
-    return f"Analyse this GitHub Actions pipeline:\n\n```yaml\n{pipeline_yaml}\n```"
 
+def build_pipeline_block(pipeline_yaml: str) -> str:
+    """
+    Build the pipeline block shared by both stages.
+    
+    Sent as the first user content block with identical text in every stage so
+    it forms a cacheable prompt prefix.
+    """
+    return PIPELINE_BLOCK_TEMPLATE % pipeline_yaml
 
-def build_execution_user_prompt(pipeline_yaml: str, analysis: Dict[str, Any]) -> str:
-    """Build user prompt for execution stage."""
-    return f"""Original Pipeline:
-    ```yaml
-    {pipeline_yaml}
-    ```
 
-    Analysis Results:
-    {json.dumps(analysis, indent=2)}
+def build_execution_instruction(analysis: Dict[str, Any]) -> str:
+    """Build the stage-specific instruction for the execution stage."""
+    return EXECUTION_INSTRUCTION_TEMPLATE % dumps_pretty(analysis)
+
 
-    Apply the recommended changes from the analysis to generate an optimised pipeline.
+def build_analysis_user_prompt(pipeline_yaml: str) -> str:
+    """Build user prompt for analysis stage."""
+    return USER_PROMPT_TEMPLATE % (build_pipeline_block(pipeline_yaml), ANALYSIS_INSTRUCTION)
 
-    Remember to format your response using the XML-style tags:
-    <optimised_yaml>
-    ... your optimised YAML here ...
-    </optimised_yaml>
 
-    <metadata>
-    ... your JSON metadata here ...
-    </metadata>
-    """
\ No newline at end of file
+def build_execution_user_prompt(pipeline_yaml: str, analysis: Dict[str, Any]) -> str:
+    """Build user prompt for execution stage."""
+    return USER_PROMPT_TEMPLATE % (build_pipeline_block(pipeline_yaml), build_execution_instruction(analysis))
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+from app.components.optimise.cache import SemanticAnalysisCache
+
+
+PIPELINE = "name: CI\non: push\njobs:\n  build:\n    runs-on: ubuntu-latest\n    steps:\n      - run: npm ci\n"
+
+
+def test_exact_hit_ignores_key_order_and_formatting():
+    """Should return the cached analysis for the same pipeline written differently."""
+    cache = SemanticAnalysisCache(max_entries=8, threshold=1.01)
+    cache.put(cache.fingerprint(PIPELINE), {"issues": ["x"]}, namespace="model")
+
+    reordered = "jobs:\n  build:\n    steps: [{run: npm ci}]\n    runs-on: ubuntu-latest\non: push\nname: CI\n"
+
+    assert cache.get(cache.fingerprint(reordered), namespace="model") == {"issues": ["x"]}
+    assert cache.get(cache.fingerprint(reordered), namespace="other-model") is None
+
+
+def test_entries_expire_after_ttl():
+    """Should stop returning an analysis once its ttl has passed."""
+    cache = SemanticAnalysisCache(max_entries=8, threshold=0.95, ttl=60)
+    with patch("app.components.optimise.cache.time.monotonic", return_value=1000.0):
+        cache.put(cache.fingerprint(PIPELINE), {"issues": []})
+        assert cache.get(cache.fingerprint(PIPELINE)) == {"issues": []}
+
+    with patch("app.components.optimise.cache.time.monotonic", return_value=1061.0):
+        assert cache.get(cache.fingerprint(PIPELINE)) is None
+
+
+def test_similar_pipeline_misses_when_guarded_features_differ():
+    """Should only reuse a similar pipeline's analysis if caching, needs, permissions and uses match."""
+    pipeline = (
+        "name: CI\non: push\njobs:\n"
+        "  build:\n    runs-on: ubuntu-latest\n    steps:\n"
+        "      - uses: actions/setup-node@v4\n        with:\n          node-version: 20\n"
+        "      - run: |\n          npm ci\n          npm run lint\n          npm run build\n          npm test\n"
+        "  deploy:\n    runs-on: ubuntu-latest\n    needs: build\n    steps:\n      - run: ./deploy.sh\n"
+    )
+    cache = SemanticAnalysisCache(max_entries=8, threshold=0.9)
+    cache.put(cache.fingerprint(pipeline), {"issues": ["missing cache"]})
+
+    edited_script = pipeline.replace("npm run lint", "npm run format")
+    with_cache = pipeline.replace("node-version: 20\n", "node-version: 20\n          cache: npm\n")
+    without_needs = pipeline.replace("    needs: build\n", "")
+
+    assert cache.get(cache.fingerprint(edited_script)) == {"issues": ["missing cache"]}
+    assert cache.get(cache.fingerprint(with_cache)) is None
+    assert cache.get(cache.fingerprint(without_needs)) is None
@@ -71,3 +71,322 @@ def test_validate_yaml_missing_keys(optimiser):
     invalid_yaml = "invalid_yaml: true"
     with pytest.raises(OptimiserError, match="missing required top-level key"):
         optimiser._validate_yaml(invalid_yaml)
+
+
+def test_analyse_pipeline_reuses_similar_analysis(optimiser):
+    """Should skip the LLM for a pipeline that only differs in names and branches."""
+    from app.components.optimise.cache import SemanticAnalysisCache
+
+    optimiser.analysis_cache = SemanticAnalysisCache(max_entries=8, threshold=0.95)
+    optimiser._call_llm = MagicMock(return_value="mock-response")
+    optimiser.llm_client.parse_json_response = MagicMock(return_value={
+        "issues": [{"description": "missing cache"}],
+        "recommended_changes": [{"change_type": "add_cache"}]
+    })
+
+    base = """
+name: CI
+on:
+  push:
+    branches: [main]
+jobs:
+  build:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - run: npm ci
+      - run: npm test
+"""
+    renamed = base.replace("name: CI", "name: Build").replace("[main]", "[develop, release]")
+
+    first = optimiser._analyse_pipeline(base)
+    second = optimiser._analyse_pipeline(renamed)
+
+    assert second == first
+    optimiser._call_llm.assert_called_once()
+
+
+def test_run_speculative_falls_back_when_one_path_fails(optimiser):
+    """Should return the single-shot result when the two-stage path fails."""
+    valid_yaml = "name: test\non: push\njobs:\n  build:\n    runs-on: ubuntu-latest"
+    optimiser.speculative_execution = True
+    optimiser._run_two_stage = MagicMock(side_effect=OptimiserError("analysis failed"))
+    optimiser._run_single_shot = MagicMock(return_value=(
+        {"issues": [], "recommended_changes": []},
+        {"optimised_yaml": valid_yaml, "applied_fixes": []}
+    ))
+
+    result = optimiser.run(valid_yaml)
+    assert result["optimised_yaml"] == valid_yaml
+    assert result["is_fixable"] is False
+
+
+def test_run_batch_preserves_order_and_isolates_failures(optimiser):
+    """Should return one result per input, in order, with errors kept per pipeline."""
+    from app.components.optimise.cache import SemanticAnalysisCache
+
+    optimiser.analysis_cache = SemanticAnalysisCache(max_entries=0)
+    valid_yaml = "name: test\non: push\njobs:\n  build:\n    runs-on: ubuntu-latest"
+    optimiser.llm_client.batch_completion = MagicMock(side_effect=[
+        {"analyse-0": "analysis-0", "analyse-2": "analysis-2"},
+        {"execute-0": "execution-0", "execute-2": "execution-2"}
+    ])
+    optimiser.llm_client.parse_json_response = MagicMock(
+        return_value={"issues": [], "recommended_changes": [{"change_type": "add_cache"}]}
+    )
+    optimiser.llm_client.parse_optimiser_response = MagicMock(side_effect=[
+        {"optimised_yaml": valid_yaml, "applied_fixes": [{"issue": "x", "fix": "add cache"}]},
+        {"optimised_yaml": "invalid_yaml: true", "applied_fixes": []}
+    ])
+
+    results = optimiser.run_batch([valid_yaml, "", valid_yaml + "\n# other repo"])
+
+    assert len(results) == 3
+    assert results[0]["optimised_yaml"] == valid_yaml
+    assert results[0]["is_fixable"] is True
+    assert "error" in results[1]
+    assert "error" in results[2]
+    assert optimiser.llm_client.batch_completion.call_count == 2
+
+
+def test_execute_optimisations_validates_streamed_yaml_early(optimiser):
+    """Should stream the execution response and validate the YAML block exactly once."""
+    optimised_yaml = "name: test\non: push\njobs:\n  build:\n    runs-on: ubuntu-latest"
+    chunks = ["<optimised_yaml>\n", optimised_yaml, "\n</optimised_yaml>\n", "<metadata>", "{}</metadata>"]
+    seen_at_validation = []
+
+    def stream(**kwargs):
+        yield from chunks
+
+    optimiser.llm_client.stream_completion = MagicMock(side_effect=stream)
+    optimiser.llm_client.parse_optimiser_response = MagicMock(return_value={
+        "optimised_yaml": optimised_yaml,
+        "applied_fixes": []
+    })
+    original_validate = optimiser._validate_yaml
+    optimiser._validate_yaml = MagicMock(
+        side_effect=lambda content, cid=None: seen_at_validation.append(content) or original_validate(content, cid)
+    )
+
+    result = optimiser._execute_optimisations("yaml", {"issues": []}, validate=True)
+
+    assert result["optimised_yaml"] == optimised_yaml
+    assert seen_at_validation == [optimised_yaml]
+    optimiser.llm_client.chat_completion.assert_not_called()
+
+
+def test_save_issues_to_db_matches_fixes_by_substring(optimiser):
+    """Should pair each issue with the first fix whose issue text overlaps its description."""
+    optimiser.repository = MagicMock()
+    result = {
+        "issues_detected": [
+            {"description": "Missing npm cache in build job", "type": "caching"},
+            {"description": "Lint waits on test"},
+            {"description": "Unrelated issue"}
+        ],
+        "applied_fixes": [
+            {"issue": "Lint waits on test job unnecessarily", "fix": "removed needs"},
+            {"issue": "npm cache", "fix": "added actions/cache"},
+            {"issue": "Missing npm cache in build job", "fix": "second match"}
+        ]
+    }
+
+    optimiser._save_issues_to_db({"run_id": 1}, result)
+
+    saved = optimiser.repository.save_issues.call_args.kwargs["issues"]
+    assert [issue["suggested_fix"] for issue in saved] == ["added actions/cache", "removed needs", "TBD"]
+
+
+def test_run_concurrent_bounds_in_flight_runs(optimiser):
+    """Should keep input order, cap in-flight runs and isolate failures."""
+    import threading
+    import time
+
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+
+    def fake_run(pipeline_yaml, correlation_id=None):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.02)
+        with lock:
+            in_flight["now"] -= 1
+        if pipeline_yaml == "bad":
+            raise OptimiserError("boom")
+        return {"optimised_yaml": pipeline_yaml}
+
+    optimiser.run = MagicMock(side_effect=fake_run)
+
+    results = optimiser.run_concurrent(["a", "bad", "c", "d", "e"], max_concurrency=2)
+
+    assert results == [
+        {"optimised_yaml": "a"},
+        {"error": "boom"},
+        {"optimised_yaml": "c"},
+        {"optimised_yaml": "d"},
+        {"optimised_yaml": "e"}
+    ]
+    assert in_flight["peak"] <= 2
+
+
+def test_run_rejects_oversized_pipeline_before_llm_call(optimiser):
+    """Should fail fast without calling the LLM when the YAML exceeds the token budget."""
+    optimiser.max_input_tokens = 5000
+    optimiser._call_llm = MagicMock()
+
+    with pytest.raises(OptimiserError, match="too large"):
+        optimiser.run("name: big\n" + "# padding\n" * 5000)
+
+    optimiser._call_llm.assert_not_called()
+
+
+def test_run_skips_execution_when_no_changes_recommended(optimiser):
+    """Should return the original YAML without an execution call when nothing is recommended."""
+    from app.components.optimise.cache import SemanticAnalysisCache
+
+    optimiser.analysis_cache = SemanticAnalysisCache(max_entries=0)
+    optimiser._call_llm = MagicMock(return_value="mock-response")
+    optimiser.llm_client.parse_json_response = MagicMock(
+        return_value={"issues": [], "recommended_changes": []}
+    )
+
+    result = optimiser.run("on: push\njobs:\n  build:\n    runs-on: ubuntu-latest")
+
+    assert result["optimised_yaml"] == "on: push\njobs:\n  build:\n    runs-on: ubuntu-latest"
+    assert result["is_fixable"] is False
+    optimiser._call_llm.assert_called_once()
+
+
+def test_fix_index_memoises_matches_for_repeated_fix_sets():
+    """Should reuse a remembered match when the same fix set and description come back."""
+    from app.components.optimise.helper import FixIndex
+
+    fixes = [{"issue": "memo test npm cache", "fix": "added cache"}]
+    assert FixIndex(fixes).match("memo test npm cache missing")["fix"] == "added cache"
+
+    repeat = FixIndex([{"issue": "memo test npm cache", "fix": "added cache again"}])
+    with patch.object(FixIndex, "_find", side_effect=AssertionError("should hit memo")):
+        assert repeat.match("memo test npm cache missing")["fix"] == "added cache again"
+
+
+def test_validate_yaml_rejects_non_mapping(optimiser):
+    """Should raise OptimiserError instead of crashing when the YAML is not a mapping."""
+    with pytest.raises(OptimiserError, match="must be a mapping"):
+        optimiser._validate_yaml("- just\n- a list")
+
+
+def test_run_batch_sends_identical_yamls_once(optimiser):
+    """Should optimise duplicate YAMLs once and give each duplicate its own copy of the result."""
+    from app.components.optimise.cache import SemanticAnalysisCache
+
+    optimiser.analysis_cache = SemanticAnalysisCache(max_entries=0)
+    valid_yaml = "name: test\non: push\njobs:\n  build:\n    runs-on: ubuntu-latest"
+    optimiser.llm_client.batch_completion = MagicMock(side_effect=[
+        {"analyse-0": "analysis-0"},
+        {"execute-0": "execution-0"}
+    ])
+    optimiser.llm_client.parse_json_response = MagicMock(
+        return_value={"issues": [], "recommended_changes": [{"change_type": "add_cache"}]}
+    )
+    optimiser.llm_client.parse_optimiser_response = MagicMock(return_value={
+        "optimised_yaml": valid_yaml, "applied_fixes": [{"issue": "x", "fix": "add cache"}]
+    })
+
+    results = optimiser.run_batch([valid_yaml, valid_yaml, valid_yaml])
+
+    analysis_requests = optimiser.llm_client.batch_completion.call_args_list[0].args[0]
+    assert [custom_id for custom_id, _, _ in analysis_requests] == ["analyse-0"]
+    assert results[0] == results[1] == results[2]
+    assert results[1] is not results[0]
+
+
+def test_validate_yaml_rejects_missing_key_without_full_parse(optimiser):
+    """Should report a missing top-level key from the header scan alone."""
+    with patch("app.components.optimise.optimiser.yaml.parse") as mock_parse:
+        with pytest.raises(OptimiserError, match="missing required top-level key: 'jobs'"):
+            optimiser._validate_yaml("name: test\non:\n  push:\n    branches: [main]\n")
+        mock_parse.assert_not_called()
+
+
+def test_validate_yaml_header_scan_defers_ambiguous_layouts(optimiser):
+    """Should leave flow-style or aliased top-level keys to the full parser."""
+    optimiser._validate_yaml("{name: test, on: push, jobs: {build: {runs-on: ubuntu-latest}}}")
+    optimiser._validate_yaml("name: test\n'on': push\njobs:\n  build:\n    runs-on: ubuntu-latest")
+
+
+def test_run_combined_uses_one_llm_call(optimiser):
+    """Should analyse and execute in a single LLM call and cache the analysis."""
+    from app.components.optimise.cache import SemanticAnalysisCache
+
+    optimiser.analysis_cache = SemanticAnalysisCache(max_entries=8)
+    valid_yaml = "name: test\non: push\njobs:\n  build:\n    runs-on: ubuntu-latest"
+    optimiser._call_llm = MagicMock(
+        return_value='<analysis>{}</analysis><optimised_yaml>x</optimised_yaml><metadata>{}</metadata>'
+    )
+    optimiser.llm_client.parse_json_response = MagicMock(
+        return_value={"issues": [{"description": "no cache"}], "recommended_changes": [{"change_type": "add_cache"}]}
+    )
+    optimiser.llm_client.parse_optimiser_response = MagicMock(return_value={
+        "optimised_yaml": valid_yaml, "applied_fixes": [{"issue": "no cache", "fix": "add cache"}]
+    })
+
+    result = optimiser.run_combined(valid_yaml)
+
+    assert result["optimised_yaml"] == valid_yaml
+    assert result["is_fixable"] is True
+    optimiser._call_llm.assert_called_once()
+    assert optimiser.analysis_cache.get(optimiser.analysis_cache.fingerprint(valid_yaml), namespace="mock-model")
+
+
+def test_run_many_tags_results_with_pipeline_path(optimiser):
+    """Should return one result per workflow file, labelled with its path."""
+    optimiser.run = MagicMock(side_effect=lambda pipeline_yaml, correlation_id=None: {"optimised_yaml": pipeline_yaml})
+
+    results = optimiser.run_many([(".github/workflows/ci.yml", "a"), (".github/workflows/cd.yml", "b")])
+
+    assert results == [
+        {"pipeline_path": ".github/workflows/ci.yml", "optimised_yaml": "a"},
+        {"pipeline_path": ".github/workflows/cd.yml", "optimised_yaml": "b"}
+    ]
+
+
+def test_validate_yaml_event_scan_matches_full_load_checks(optimiser):
+    """Should keep full-load rejections while only scanning parser events."""
+    with pytest.raises(OptimiserError, match="has no jobs defined"):
+        optimiser._validate_yaml("name: test\non: push\njobs: {}\n")
+    with pytest.raises(OptimiserError, match="invalid"):
+        optimiser._validate_yaml("name: test\non: push\njobs: *undefined\n")
+    with pytest.raises(OptimiserError, match="invalid"):
+        optimiser._validate_yaml("name: test\non: push\njobs: {build: 1}\nenv: [unclosed\n")
+
+    optimiser._validate_yaml("name: test\nyes: push\njobs:\n  build: &b {runs-on: x}\n  test: *b\n")
+
+
+def test_validate_yaml_does_not_treat_y_as_on(optimiser):
+    """Should reject a 'y' key in place of 'on', since it loads as the string 'y'."""
+    with pytest.raises(OptimiserError, match="missing required top-level key: 'on'"):
+        optimiser._validate_yaml("name: test\ny: push\njobs:\n  build:\n    runs-on: ubuntu-latest\n")
+
+
+def test_validate_yaml_falls_back_to_full_load_for_top_level_merge_and_alias(optimiser):
+    """Should resolve top-level merge keys and aliases with the full loader."""
+    base = "x-defaults: &defaults\n  name: test\n  on: push\n"
+    optimiser._validate_yaml(base + "<<: *defaults\njobs:\n  build:\n    runs-on: x\n")
+    optimiser._validate_yaml("x-jobs: &jobs\n  build:\n    runs-on: x\nname: test\non: push\njobs: *jobs\n")
+    with pytest.raises(OptimiserError, match="has no jobs defined"):
+        optimiser._validate_yaml("x-jobs: &jobs {}\nname: test\non: push\njobs: *jobs\n")
+
+
+def test_validate_yaml_jobs_verdict_matches_on_both_paths(optimiser):
+    """Should require jobs to be a non-empty mapping whether the event scan or the full load decides."""
+    for jobs in ("build", "[build, test]", "{}"):
+        yaml_content = f"name: test\non: push\njobs: {jobs}\n"
+        assert Optimiser._scan_top_level(yaml_content)[1] is False
+        assert Optimiser._load_top_level(yaml_content)[1] is False
+        with pytest.raises(OptimiserError, match="has no jobs defined"):
+            optimiser._validate_yaml(yaml_content)
+
+    yaml_content = "name: test\non: push\njobs:\n  build:\n    runs-on: x\n"
+    assert Optimiser._scan_top_level(yaml_content)[1] is True
+    assert Optimiser._load_top_level(yaml_content)[1] is True
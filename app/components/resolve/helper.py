@@ -0,0 +1,66 @@
+"""
+Resolver helpers - short-lived in-process cache for GitHub metadata lookups.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Thread-safe LRU mapping whose entries expire ttl seconds after being stored.
+
+    Used for lookups like repository objects and branch heads that rarely
+    change between back-to-back resolver runs. Expired entries are kept until
+    evicted so callers can peek at them and revalidate with a conditional request.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl: float = 60.0):
+        """
+        Initialise cache.
+
+        Args:
+            max_entries: Maximum number of entries kept (least recently used evicted)
+            ttl: Seconds an entry stays valid (0 or less disables the cache)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[0]:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value even if expired, or None if missing."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Drop an entry, e.g. after the cached value proved stale."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
@@ -2,18 +2,148 @@
 Enhanced Resolver Agent - Resolves pipeline issues by creating PRs with optimised YAML.
 """
 
-from typing import Dict, Any, Optional
-
-from github import Github, Auth
-from github.GithubException import GithubException
+import bisect
+import hashlib
+import io
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 from app.components.base_service import BaseService
 from app.utils.logger import get_logger
 from app.config import config
 from app.exceptions import ResolverError
+from app.components.resolve.helper import TTLCache
 
 logger = get_logger(__name__, "Resolver")
 
+# https://, ssh:// (optionally with user:token@ and www.) or git@github.com: owner/repo(.git),
+# nothing after the repo
+GITHUB_URL_PATTERN = re.compile(
+    r"(?:(?:https?|ssh)://(?:[^@/]+@)?(?:www\.)?github\.com/|git@github\.com:)([\w.-]+)/([\w.-]+?)(?:\.git)?/?$"
+)
+
+# Open PRs for a head/base branch pair, with the head owner to tell same-repo branches from forks
+OPEN_PR_QUERY = """
+query($owner: String!, $name: String!, $head: String!, $base: String!) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: 10, states: OPEN, headRefName: $head, baseRefName: $base) {
+      nodes { url headRepositoryOwner { login } }
+    }
+  }
+}
+"""
+
+# Merge confidence lower bounds and the status text for each band (bisect_right over the bounds)
+STATUS_THRESHOLDS = (0.25, 0.5, 0.8)
+STATUS_TEXTS = (
+    "Manual intervention needed",
+    "Careful review required",
+    "Review recommended",
+    "Ready to merge",
+)
+
+# Fixed PR body sections
+PR_HEADER_TEMPLATE = "Automated optimisation for `%s`"
+PR_CORRELATION_TEMPLATE = " | Correlation ID: `%s`"
+PR_SUMMARY_HEADER = "## Optimiser Summary\n\n"
+PR_DEFAULT_CHANGES = "optimised pipeline configuration\n"
+PR_CRITIC_HEADER = "\n---\n\n## Critic Review\n\n"
+PR_RISK_HEADER = "\n---\n\n## Risk Assessment\n\n"
+PR_FOOTER = "\n---\n*Auto-generated by Pipeline optimiser*"
+# Whole body when there is no analysis, critic review or risk assessment: (file path, correlation part)
+PR_DEFAULT_BODY_TEMPLATE = PR_HEADER_TEMPLATE + "%s\n\n" + PR_SUMMARY_HEADER + PR_DEFAULT_CHANGES + PR_FOOTER
+
+# PyGithub pulls in a large dependency tree, so it is imported on first use (see _import_github)
+Github = None
+Auth = None
+GithubException = None
+GithubRetry = None
+
+# Transient GitHub statuses retried with exponential backoff; 404/422 stay terminal.
+# GithubRetry also retries 403 when the response marks it as a rate limit.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF_MAX = 60.0
+RETRY_BACKOFF_JITTER = 1.0
+
+
+def _import_github() -> None:
+    """Import PyGithub into the module globals, keeping any already set (e.g. test patches)."""
+    global Github, Auth, GithubException, GithubRetry
+    if Github is not None and Auth is not None and GithubException is not None and GithubRetry is not None:
+        return
+
+    from github import Auth as _Auth, Github as _Github
+    from github.GithubException import GithubException as _GithubException
+    from github.GithubRetry import GithubRetry as _GithubRetry
+
+    Github = Github or _Github
+    Auth = Auth or _Auth
+    GithubException = GithubException or _GithubException
+    GithubRetry = GithubRetry or _GithubRetry
+
+
+# One PyGithub client per token, so its HTTP connection pool outlives each per-request Resolver
+_github_clients: Dict[str, Any] = {}
+_github_clients_lock = threading.Lock()
+# One lock per (token, repository) serialises runs that would race on the same branches and PRs
+_repo_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+# Repository objects and base branch refs, reused by back-to-back runs on the same repo and
+# revalidated with a conditional request (304s don't count against the rate limit) once expired
+_repo_cache = TTLCache(max_entries=config.GITHUB_CACHE_SIZE, ttl=config.GITHUB_CACHE_TTL)
+_base_ref_cache = TTLCache(max_entries=config.GITHUB_CACHE_SIZE, ttl=config.GITHUB_CACHE_TTL)
+
+# Runs GitHub lookups that do not depend on the branch/commit calls alongside them
+_lookup_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="resolver-lookup")
+
+
+def _github_client(gh_token: str) -> Any:
+    """Return the shared GitHub client for a token, creating it on first use."""
+    client = _github_clients.get(gh_token)
+    if client is None:
+        with _github_clients_lock:
+            client = _github_clients.get(gh_token)
+            if client is None:
+                _import_github()
+                # Every call goes through the requester, so one retry policy covers them all;
+                # urllib3 honours Retry-After and GithubRetry waits for X-RateLimit-Reset
+                retry = GithubRetry(
+                    total=config.GITHUB_MAX_RETRIES,
+                    backoff_factor=config.GITHUB_RETRY_BACKOFF,
+                    backoff_max=RETRY_BACKOFF_MAX,
+                    backoff_jitter=RETRY_BACKOFF_JITTER,
+                    status_forcelist=list(RETRY_STATUSES)
+                )
+                # Sized for concurrent resolvers plus the overlapped lookups sharing this client
+                client = Github(auth=Auth.Token(gh_token), retry=retry, pool_size=config.GITHUB_POOL_SIZE)
+                _github_clients[gh_token] = client
+    return client
+
+
+def _repo_lock(gh_token: str, repo_name: str) -> threading.Lock:
+    """Return the lock serialising runs on a repository with a token (names are case-insensitive)."""
+    with _github_clients_lock:
+        return _repo_locks.setdefault((gh_token, repo_name.casefold()), threading.Lock())
+
+
+def _severity_prefix(item: Dict[str, Any]) -> str:
+    """'[SEVERITY] ' when the item carries a severity, otherwise nothing."""
+    return f"[{str(item['severity']).upper()}] " if "severity" in item else ""
+
+
+def _location_suffix(item: Dict[str, Any]) -> str:
+    """' (`location`)' when the item carries a location, otherwise nothing."""
+    return f" (`{item['location']}`)" if "location" in item else ""
+
+
+def _normalise_items(items: Optional[list], text_key: str) -> List[Dict[str, Any]]:
+    """Wrap plain-string list items as {text_key: item}, leaving dict items as they are."""
+    return [item if isinstance(item, dict) else {text_key: str(item)} for item in items or ()]
+
 
 class Resolver(BaseService):
     """
@@ -38,10 +168,17 @@ class Resolver(BaseService):
             logger.error("GITHUB_TOKEN is required for Resolver", correlation_id="INIT")
             raise ResolverError("GITHUB_TOKEN is required for Resolver")
 
-        auth = Auth.Token(self.gh_token)
-        self.gh = Github(auth=auth)
+        # The client is created on first use, so URL parsing and PR body building need no HTTP setup
+        self._gh = None
         logger.debug("Initialised Resolver with GitHub token", correlation_id="INIT")
 
+    @property
+    def gh(self) -> Any:
+        """GitHub client shared by every Resolver using the same token."""
+        if self._gh is None:
+            self._gh = _github_client(self.gh_token)
+        return self._gh
+
     def run(
         self,
         repo_url: str,
@@ -52,7 +189,9 @@ class Resolver(BaseService):
         pr_create: bool = True,
         analysis_result: Optional[Dict[str, Any]] = None,
         risk_assessment: Optional[Dict[str, Any]] = None,
-        critic_review: Optional[Dict[str, Any]] = None
+        critic_review: Optional[Dict[str, Any]] = None,
+        base_content: Optional[str] = None,
+        pr_branch: Optional[str] = None
     ) -> Optional[str]:
         """
         Push optimised YAML to repo and optionally create a pull request.
@@ -67,9 +206,13 @@ class Resolver(BaseService):
             analysis_result: Optional analysis results for PR description
             risk_assessment: Optional risk assessment for PR description
             critic_review: Optional LLM review results with confidence scores
+            base_content: Optional current file content on base_branch, lets a fresh
+                branch be committed to without probing for the file first
+            pr_branch: Optional branch name (defaults to _branch_name(correlation_id))
             
         Returns:
-            URL of created PR, or None if pr_create=False
+            URL of created PR, or None if pr_create=False or the optimised YAML
+            already matches the file on base_branch
             
         Raises:
             ResolverError: If file_path is invalid or GitHub operations fail
@@ -81,42 +224,75 @@ class Resolver(BaseService):
         if not optimised_yaml or not optimised_yaml.strip():
             raise ResolverError("optimised_yaml is required and cannot be empty")
         
-        # Create target branch name with correlation id suffix
-        pr_branch = f"optimise-pipeline-{correlation_id}" if correlation_id else "optimise-pipeline"
-        repo_name = self._extract_repo_name(repo_url)
+        # Nothing changed, so a branch, commit and PR would all be no-ops
+        if base_content is not None and optimised_yaml == base_content:
+            logger.info(f"Optimised {file_path} matches {base_branch}, nothing to resolve", correlation_id=correlation_id)
+            return None
         
+        pr_branch = pr_branch or self._branch_name(correlation_id)
+        repo_name = self._extract_repo_name(repo_url)
+        # Concurrent runs on the same repository would race on its branches and open PR,
+        # so they queue here; runs on other repositories go ahead. A bounded wait keeps a
+        # run stuck in retry backoff or a rate-limit sleep from blocking the rest forever
+        lock = _repo_lock(self.gh_token, repo_name)
+        if not lock.acquire(timeout=config.GITHUB_LOCK_TIMEOUT):
+            raise ResolverError(f"Timed out waiting for another run on {repo_name}")
         try:
-            repo = self.gh.get_repo(repo_name)
+            self._ensure_rate_budget(correlation_id)
             
-            # Create branch
-            self._create_branch(repo, pr_branch, base_branch, correlation_id)
-            
-            # Commit changes
-            self._commit_changes(repo, file_path, optimised_yaml, pr_branch, correlation_id)
-            
-            # Create PR if requested
-            if pr_create:
-                pr_url = self._create_pull_request(
-                    repo=repo,
-                    pr_branch=pr_branch,
-                    base_branch=base_branch,
-                    file_path=file_path,
-                    correlation_id=correlation_id,
-                    analysis_result=analysis_result,
-                    risk_assessment=risk_assessment,
-                    critic_review=critic_review
+            try:
+                repo = self._get_repo(repo_name)
+                # The canonical login from the repo payload: the URL's owner may differ in case,
+                # or be an old name that GitHub redirects
+                owner = repo.owner.login
+                
+                # Without the base content, compare blob shas before touching any branch
+                if base_content is None and self._base_blob_sha(repo, file_path, base_branch) == self._git_blob_sha(optimised_yaml):
+                    logger.info(f"Optimised {file_path} matches {base_branch}, nothing to resolve", correlation_id=correlation_id)
+                    return None
+                
+                # The open PR lookup only needs the branch names, so it overlaps branch creation and commit
+                open_pr = (
+                    _lookup_executor.submit(self._find_open_pr, repo, owner, pr_branch, base_branch, correlation_id)
+                    if pr_create else None
                 )
-                return pr_url
-            
-            logger.info("Changes committed to branch without PR", correlation_id=correlation_id)
-            return None
-            
-        except GithubException as e:
-            logger.error(f"GitHub API error: {e}", correlation_id=correlation_id)
-            raise ResolverError(f"GitHub operation failed: {e}") from e
-        except Exception as e:
-            logger.exception(f"Unexpected error: {e}", correlation_id=correlation_id)
-            raise ResolverError(f"Unexpected error: {e}") from e
+                
+                # Create branch
+                created = self._create_branch(repo, pr_branch, base_branch, correlation_id)
+                
+                # A fresh branch holds the base file, so its blob sha is known locally
+                known_sha = self._git_blob_sha(base_content) if created and base_content else None
+                
+                # Commit changes
+                self._commit_changes(repo, file_path, optimised_yaml, pr_branch, correlation_id, known_sha)
+                
+                # Create PR if requested
+                if pr_create:
+                    pr_url = self._create_pull_request(
+                        repo=repo,
+                        owner=owner,
+                        pr_branch=pr_branch,
+                        base_branch=base_branch,
+                        file_path=file_path,
+                        correlation_id=correlation_id,
+                        analysis_result=analysis_result,
+                        risk_assessment=risk_assessment,
+                        critic_review=critic_review,
+                        open_pr=open_pr
+                    )
+                    return pr_url
+                
+                logger.info("Changes committed to branch without PR", correlation_id=correlation_id)
+                return None
+                
+            except GithubException as e:
+                logger.error(f"GitHub API error: {e}", correlation_id=correlation_id)
+                raise ResolverError(f"GitHub operation failed: {e}") from e
+            except Exception as e:
+                logger.exception(f"Unexpected error: {e}", correlation_id=correlation_id)
+                raise ResolverError(f"Unexpected error: {e}") from e
+        finally:
+            lock.release()
 
     def _execute(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -147,6 +323,8 @@ class Resolver(BaseService):
             state["error"] = "pipeline_path is required for PR creation"
             return state
 
+        branch_name = self._branch_name(correlation_id)
+
         try:
             pr_url = self.run(
                 repo_url=state["repo_url"],
@@ -157,7 +335,9 @@ class Resolver(BaseService):
                 pr_create=True,
                 analysis_result=state.get("analysis_result"),
                 risk_assessment=state.get("risk_assessment"),
-                critic_review=state.get("critic_review")
+                critic_review=state.get("critic_review"),
+                base_content=state.get("pipeline_yaml"),
+                pr_branch=branch_name
             )
 
             if pr_url:
@@ -165,7 +345,6 @@ class Resolver(BaseService):
                 logger.info(f"PR created: {pr_url}", correlation_id=correlation_id)
                 
                 # Save PR info to database
-                branch_name = f"optimise-pipeline-{correlation_id}" if correlation_id else "optimise-pipeline"
                 try:
                     self.repository.save_pr(
                         run_id=state["run_id"],
@@ -194,9 +373,16 @@ class Resolver(BaseService):
         """
         return None
 
-    def _extract_repo_name(self, repo_url: str) -> str:
+    @staticmethod
+    def _branch_name(correlation_id: Optional[str] = None) -> str:
+        """Target branch name, suffixed with the correlation id when present."""
+        return f"optimise-pipeline-{correlation_id}" if correlation_id else "optimise-pipeline"
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _extract_repo_name(repo_url: str) -> str:
         """
-        Extract repository name from GitHub URL.
+        Extract repository name from GitHub URL (cached per URL).
         
         Args:
             repo_url: GitHub repository URL
@@ -207,15 +393,65 @@ class Resolver(BaseService):
         Raises:
             ResolverError: If URL is invalid
         """
+        match = GITHUB_URL_PATTERN.match(repo_url.strip())
+        if not match:
+            raise ResolverError(f"Invalid GitHub repository URL: {repo_url}")
+        
+        return f"{match.group(1)}/{match.group(2)}"
 
-        url = repo_url.rstrip("/")
+    def _ensure_rate_budget(self, correlation_id: Optional[str] = None) -> None:
+        """
+        Fail before any GitHub call when the last seen rate limit can't cover a full run.
         
-        if "github.com/" in url:
-            parts = url.split("github.com/")[1].split("/")
-            if len(parts) >= 2:
-                return f"{parts[0]}/{parts[1].replace('.git', '')}"
+        Reads the X-RateLimit-Remaining/Reset values PyGithub keeps from the previous
+        response on the shared client, so the check itself costs no request and a
+        run can't stop halfway with a dangling branch.
         
-        raise ResolverError(f"Invalid GitHub repository URL: {repo_url}")
+        Raises:
+            ResolverError: If fewer than GITHUB_MIN_RATE_BUDGET requests remain before the reset
+        """
+        try:
+            requester = self.gh.requester
+            remaining, limit = requester.rate_limiting
+            reset_at = requester.rate_limiting_resettime
+        except (AttributeError, TypeError, ValueError):
+            # Client doesn't expose rate limit state
+            return
+        
+        # limit is -1 until the first response has been seen
+        if limit < 0 or remaining >= config.GITHUB_MIN_RATE_BUDGET:
+            return
+        wait = reset_at - time.time()
+        if wait <= 0:
+            return
+        
+        logger.warning(
+            f"GitHub rate limit low ({remaining}/{limit} left), resets in {wait:.0f}s",
+            correlation_id=correlation_id
+        )
+        raise ResolverError(f"GitHub rate limit low ({remaining} requests left), retry after {wait:.0f}s")
+
+    def _get_repo(self, repo_name: str) -> Any:
+        """Get the repository object, reusing one fetched within the cache TTL."""
+        return self._cached_lookup(_repo_cache, (self.gh_token, repo_name), lambda: self.gh.get_repo(repo_name))
+
+    @staticmethod
+    def _cached_lookup(cache: TTLCache, key: Any, fetch: Callable[[], Any]) -> Any:
+        """
+        Return a cached GitHub object, revalidating it once its TTL has passed.
+        
+        An expired object is refreshed with update(), which sends its ETag as
+        If-None-Match; an unchanged resource answers 304 without using rate limit.
+        """
+        obj = cache.get(key)
+        if obj is None:
+            obj = cache.peek(key)
+            if obj is None:
+                obj = fetch()
+            else:
+                obj.update()
+            cache.put(key, obj)
+        return obj
 
     def _create_branch(
         self,
@@ -223,7 +459,7 @@ class Resolver(BaseService):
         pr_branch: str,
         base_branch: str,
         correlation_id: Optional[str] = None
-    ) -> None:
+    ) -> bool:
         """
         Create a new branch from base branch.
         
@@ -232,21 +468,29 @@ class Resolver(BaseService):
             pr_branch: Name of branch to create
             base_branch: Base branch to branch from
             correlation_id: Request correlation ID
+            
+        Returns:
+            True if the branch was created, False if it already existed
         """
         # Get base branch SHA
-        base_ref = repo.get_git_ref(f"heads/{base_branch}")
-        base_sha = base_ref.object.sha
+        ref_key = (self.gh_token, repo.full_name, base_branch)
+        base_sha = self._cached_lookup(
+            _base_ref_cache, ref_key, lambda: repo.get_git_ref(f"heads/{base_branch}")
+        ).object.sha
         
         # Create target branch
         try:
             repo.create_git_ref(ref=f"refs/heads/{pr_branch}", sha=base_sha)
             logger.debug(f"Created branch: {pr_branch}", correlation_id=correlation_id)
+            return True
         except GithubException as e:
+            # The cached head may be stale (e.g. base force-pushed), look it up again next time
+            _base_ref_cache.pop(ref_key)
             if e.status == 422:
                 # Branch already exists
                 logger.warning(f"Branch already exists: {pr_branch}", correlation_id=correlation_id)
-            else:
-                raise
+                return False
+            raise
 
     def _commit_changes(
         self,
@@ -254,7 +498,8 @@ class Resolver(BaseService):
         file_path: str,
         optimised_yaml: str,
         pr_branch: str,
-        correlation_id: Optional[str] = None
+        correlation_id: Optional[str] = None,
+        known_sha: Optional[str] = None
     ) -> None:
         """
         Commit changes to the branch.
@@ -265,24 +510,47 @@ class Resolver(BaseService):
             optimised_yaml: Content to commit
             pr_branch: Branch to commit to
             correlation_id: Request correlation ID
+            known_sha: Expected blob sha of the file on pr_branch, skips the existence probe
         """
+        # Build commit message
+        commit_message = f"Optimise CI/CD pipeline: {file_path}"
+        if correlation_id:
+            commit_message += f" [{correlation_id}]"
+        
+        if known_sha:
+            try:
+                repo.update_file(
+                    path=file_path,
+                    message=commit_message,
+                    content=optimised_yaml,
+                    sha=known_sha,
+                    branch=pr_branch,
+                )
+                logger.debug(f"File updated successfully: {file_path}", correlation_id=correlation_id)
+                return
+            except GithubException as e:
+                if e.status not in (404, 409, 422):
+                    raise
+                # Local content differed from the branch (e.g. line endings), fall back to probing
+                logger.debug(
+                    f"Known sha rejected for {file_path} ({e.status}), probing branch",
+                    correlation_id=correlation_id
+                )
+        
         # Check if file exists
-        file_exists = False
         file_sha = None
         try:
-            file_content = repo.get_contents(file_path, ref=pr_branch)
-            file_exists = True
-            file_sha = file_content.sha
+            file_sha = repo.get_contents(file_path, ref=pr_branch).sha
         except GithubException:
             pass
 
-        # Build commit message
-        commit_message = f"Optimise CI/CD pipeline: {file_path}"
-        if correlation_id:
-            commit_message += f" [{correlation_id}]"
-        
+        # A retried run may find its content already committed, skip the no-op write
+        if file_sha and file_sha == self._git_blob_sha(optimised_yaml):
+            logger.debug(f"Branch already holds optimised {file_path}, nothing to commit", correlation_id=correlation_id)
+            return
+
         # Update or create file
-        if file_exists and file_sha:
+        if file_sha:
             repo.update_file(
                 path=file_path,
                 message=commit_message,
@@ -300,22 +568,39 @@ class Resolver(BaseService):
             )
             logger.debug(f"File created successfully: {file_path}", correlation_id=correlation_id)
 
+    @staticmethod
+    def _base_blob_sha(repo: Any, file_path: str, base_branch: str) -> Optional[str]:
+        """Return the blob sha of file_path on base_branch, or None if it is missing."""
+        try:
+            return repo.get_contents(file_path, ref=base_branch).sha
+        except GithubException:
+            return None
+
+    @staticmethod
+    def _git_blob_sha(content: str) -> str:
+        """Compute the git blob sha GitHub reports for a file with this content."""
+        data = content.encode("utf-8")
+        return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
     def _create_pull_request(
         self,
         repo: Any,
+        owner: str,
         pr_branch: str,
         base_branch: str,
         file_path: str,
         correlation_id: Optional[str] = None,
         analysis_result: Optional[Dict[str, Any]] = None,
         risk_assessment: Optional[Dict[str, Any]] = None,
-        critic_review: Optional[Dict[str, Any]] = None
+        critic_review: Optional[Dict[str, Any]] = None,
+        open_pr: Optional[Future] = None
     ) -> str:
         """
         Create a pull request.
         
         Args:
             repo: GitHub repository object
+            owner: Repository owner login
             pr_branch: Head branch for PR
             base_branch: Base branch for PR
             file_path: Path to file being changed
@@ -323,19 +608,17 @@ class Resolver(BaseService):
             analysis_result: Analysis results for PR description
             risk_assessment: Risk assessment for PR description
             critic_review: critic review results with confidence scores
+            open_pr: Optional _find_open_pr lookup already started by run
             
         Returns:
             URL of created PR
         """
         # Check for existing PR
-        open_prs = repo.get_pulls(
-            state="open",
-            head=f"{repo.owner.login}:{pr_branch}",
-            base=base_branch
-        )
-
-        if open_prs.totalCount > 0:
-            pr_url = open_prs[0].html_url
+        if open_pr is not None:
+            pr_url = open_pr.result()
+        else:
+            pr_url = self._find_open_pr(repo, owner, pr_branch, base_branch, correlation_id)
+        if pr_url:
             logger.warning(f"PR already exists: {pr_url}", correlation_id=correlation_id)
             return pr_url
 
@@ -362,6 +645,54 @@ class Resolver(BaseService):
         logger.info(f"PR created successfully: {pr.html_url}", correlation_id=correlation_id)
         return pr.html_url
 
+    def _find_open_pr(
+        self,
+        repo,
+        owner: str,
+        pr_branch: str,
+        base_branch: str,
+        correlation_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Find an open PR from pr_branch into base_branch in a single GraphQL round trip.
+        
+        Falls back to the first page of the REST pulls listing if the GraphQL
+        query fails, e.g. for a token without GraphQL access.
+        
+        Args:
+            repo: GitHub repository object
+            owner: Repository owner login
+            pr_branch: Head branch of the PR
+            base_branch: Base branch of the PR
+            correlation_id: Request correlation ID
+        
+        Returns:
+            URL of the open PR, or None if there is none
+        """
+        try:
+            _, data = self.gh.requester.graphql_query(
+                OPEN_PR_QUERY,
+                {"owner": owner, "name": repo.name, "head": pr_branch, "base": base_branch}
+            )
+            nodes = data["data"]["repository"]["pullRequests"]["nodes"]
+            # headRefName matches fork branches too, REST's owner:branch filter did not
+            return next(
+                (
+                    node["url"] for node in nodes
+                    if str((node.get("headRepositoryOwner") or {}).get("login", "")).casefold() == owner.casefold()
+                ),
+                None
+            )
+        except (GithubException, AttributeError, KeyError, TypeError) as e:
+            logger.debug(
+                f"GraphQL PR lookup failed ({type(e).__name__}), using REST",
+                correlation_id=correlation_id
+            )
+
+        # First item only: one page request, where totalCount plus indexing cost two
+        open_pr = next(iter(repo.get_pulls(state="open", head=f"{owner}:{pr_branch}", base=base_branch)), None)
+        return open_pr.html_url if open_pr is not None else None
+
     def _build_pr_body(
         self,
         file_path: str,
@@ -373,43 +704,60 @@ class Resolver(BaseService):
         """
         Build compact PR description with clear separation between optimiser and reviewer.
         """
-        body_parts = []
+        # Nothing to report: fill the prebuilt default body
+        if not (analysis_result or risk_assessment or critic_review):
+            correlation_part = PR_CORRELATION_TEMPLATE % correlation_id if correlation_id else ""
+            return PR_DEFAULT_BODY_TEMPLATE % (file_path, correlation_part)
+
+        # Plain-string items become dicts once here, so the section renderers only handle dicts
+        if analysis_result:
+            analysis_result = {
+                **analysis_result,
+                "issues_detected": _normalise_items(analysis_result.get("issues_detected"), "description"),
+                "suggested_fixes": _normalise_items(analysis_result.get("suggested_fixes"), "fix")
+            }
+        if critic_review:
+            critic_review = {
+                **critic_review,
+                "issue_reviews": _normalise_items(critic_review.get("issue_reviews"), "description"),
+                "regressions": _normalise_items(critic_review.get("regressions"), "description"),
+                "unresolved_issues": _normalise_items(critic_review.get("unresolved_issues"), "description")
+            }
+
+        body = io.StringIO()
         
         # Header
-        body_parts.append(f"Automated optimisation for `{file_path}`")
+        body.write(PR_HEADER_TEMPLATE % file_path)
         if correlation_id:
-            body_parts.append(f" | Correlation ID: `{correlation_id}`")
-        body_parts.append("\n\n")
+            body.write(PR_CORRELATION_TEMPLATE % correlation_id)
+        body.write("\n\n")
         
         # optimiser Results Section
-        body_parts.append("## Optimiser Summary\n\n")
+        body.write(PR_SUMMARY_HEADER)
         
         if analysis_result:
-            self._add_analysis_section(body_parts, analysis_result)
+            self._add_analysis_section(body, analysis_result)
         else:
-            body_parts.append("optimised pipeline configuration\n")
+            body.write(PR_DEFAULT_CHANGES)
 
         # Reviewer Results Section (if available)
         if critic_review:
-            self._add_critic_review_section(body_parts, critic_review)
+            self._add_critic_review_section(body, critic_review)
 
         # Risk assessment in compact format if present
         if risk_assessment:
-            self._add_risk_assessment_section(body_parts, risk_assessment)
+            self._add_risk_assessment_section(body, risk_assessment)
 
         # Footer
-        body_parts.append(
-            "\n---\n"
-            "*Auto-generated by Pipeline optimiser*"
-        )
+        body.write(PR_FOOTER)
 
-        return "".join(body_parts)
+        return body.getvalue()
 
-    def _add_critic_review_section(self, body_parts: list, critic_review: Dict[str, Any]) -> None:
+    def _add_critic_review_section(self, body: io.StringIO, critic_review: Dict[str, Any]) -> None:
         """
         Add compact LLM review information to PR body.
         """
-        body_parts.append("\n---\n\n## Critic Review\n\n")
+        body.write(PR_CRITIC_HEADER)
         
         # Overall confidence scores in compact format
         fix_confidence = critic_review.get("fix_confidence", 0.0)
@@ -419,7 +767,7 @@ class Resolver(BaseService):
         # Determine status text
         status = self._get_status_text(merge_confidence)
         
-        body_parts.append(
+        body.write(
             f"**Confidence**: Fix {fix_confidence:.0%} | Merge {merge_confidence:.0%} | "
             f"Quality {quality_score}/10 | Status: {status}\n"
         )
@@ -430,10 +778,25 @@ class Resolver(BaseService):
         unresolved = critic_review.get("unresolved_issues", [])
         recommendations = critic_review.get("recommendations", [])
         
+        # One pass over issue reviews: count fixes and collect the ones worth showing
+        fixed = 0
+        issue_lines = []
+        for review in issue_reviews:
+            properly_fixed = review.get("properly_fixed", False)
+            confidence = review.get("confidence")
+            if properly_fixed:
+                fixed += 1
+            # Only flag reviews that report not fixed or low confidence; missing fields flag nothing
+            if (not properly_fixed and "properly_fixed" in review) or (confidence is not None and confidence < 0.8):
+                issue_lines.append(
+                    f"- Issue #{review.get('issue_id', '?')}: "
+                    f"{'FIXED' if properly_fixed else 'PARTIAL'} "
+                    f"({confidence or 0.0:.0%} confidence)\n"
+                )
+
         # Summary line
         summary_parts = []
         if issue_reviews:
-            fixed = sum(1 for r in issue_reviews if r.get("properly_fixed", False))
             summary_parts.append(f"{fixed}/{len(issue_reviews)} issues resolved")
         if regressions:
             summary_parts.append(f"{len(regressions)} potential regressions")
@@ -441,60 +804,48 @@ class Resolver(BaseService):
             summary_parts.append(f"{len(unresolved)} unresolved")
         
         if summary_parts:
-            body_parts.append(f"**Summary**: {' | '.join(summary_parts)}\n")
+            body.write(f"**Summary**: {' | '.join(summary_parts)}\n")
         
         # Compact per-issue review (only show if not all properly fixed)
-        if issue_reviews:
-            issues_to_show = [r for r in issue_reviews if not r.get("properly_fixed", True) or r.get("confidence", 1.0) < 0.8]
-            if issues_to_show:
-                body_parts.append("\n**Issue Review**:\n")
-                for review in issues_to_show:
-                    issue_id = review.get("issue_id", "?")
-                    issue_confidence = review.get("confidence", 0.0)
-                    fixed = review.get("properly_fixed", False)
-                    status_text = "FIXED" if fixed else "PARTIAL"
-                    body_parts.append(f"- Issue #{issue_id}: {status_text} ({issue_confidence:.0%} confidence)\n")
+        if issue_lines:
+            body.write("\n**Issue Review**:\n")
+            body.writelines(issue_lines)
         
         # Regressions in compact format
         if regressions:
-            body_parts.append("\n**Regressions Detected**:\n")
-            for idx, regression in enumerate(regressions, 1):
-                reg_desc = regression.get("description", "Unknown")
-                reg_severity = regression.get("severity", "medium").upper()
-                body_parts.append(f"{idx}. [{reg_severity}] {reg_desc}\n")
+            body.write("\n**Regressions Detected**:\n")
+            body.writelines((
+                f"{idx}. {_severity_prefix(regression)}{regression.get('description', 'Unknown')}\n"
+                for idx, regression in enumerate(regressions, 1)
+            ))
         
         # Unresolved issues in compact format
         if unresolved:
-            body_parts.append("\n**Unresolved**:\n")
-            for idx, issue in enumerate(unresolved, 1):
-                issue_desc = issue.get("description", "Unknown")
-                body_parts.append(f"{idx}. {issue_desc}\n")
+            body.write("\n**Unresolved**:\n")
+            body.writelines((
+                f"{idx}. {issue.get('description', 'Unknown')}\n"
+                for idx, issue in enumerate(unresolved, 1)
+            ))
         
         # Recommendations in compact format (max 3)
         if recommendations:
-            body_parts.append("\n**Recommendations**:\n")
-            for idx, rec in enumerate(recommendations[:3], 1):
-                body_parts.append(f"{idx}. {rec}\n")
+            body.write("\n**Recommendations**:\n")
+            body.writelines((
+                f"{idx}. {rec}\n" for idx, rec in enumerate(recommendations[:3], 1)
+            ))
             if len(recommendations) > 3:
-                body_parts.append(f"*...and {len(recommendations) - 3} more*\n")
+                body.write(f"*...and {len(recommendations) - 3} more*\n")
         
         # Notes only if present and not too long
         notes = critic_review.get("notes", "")
         if notes and len(notes) < 200:
-            body_parts.append(f"\n**Notes**: {notes}\n")
+            body.write(f"\n**Notes**: {notes}\n")
 
     def _get_status_text(self, merge_confidence: float) -> str:
         """Get compact status text based on confidence."""
-        if merge_confidence >= 0.8:
-            return "Ready to merge"
-        elif merge_confidence >= 0.5:
-            return "Review recommended"
-        elif merge_confidence >= 0.25:
-            return "Careful review required"
-        else:
-            return "Manual intervention needed"
+        return STATUS_TEXTS[bisect.bisect_right(STATUS_THRESHOLDS, merge_confidence)]
 
-    def _add_analysis_section(self, body_parts: list, analysis_result: Dict[str, Any]) -> None:
+    def _add_analysis_section(self, body: io.StringIO, analysis_result: Dict[str, Any]) -> None:
         """
         Add compact analysis results to PR body.
         """
@@ -504,35 +855,29 @@ class Resolver(BaseService):
 
         # Issues in compact format
         if issues:
-            body_parts.append("**Issues Detected**:\n")
-            for i, issue in enumerate(issues, 1):
-                if isinstance(issue, dict):
-                    desc = issue.get("description", "No description")
-                    sev = issue.get("severity", "medium").upper()
-                    loc = issue.get("location", "unknown")
-                    body_parts.append(f"{i}. [{sev}] {desc} (`{loc}`)\n")
-                else:
-                    body_parts.append(f"{i}. {issue}\n")
-            body_parts.append("\n")
+            body.write("**Issues Detected**:\n")
+            # Severity and location only when the issue carries them, so plain-string issues stay as written
+            body.writelines((
+                f"{i}. {_severity_prefix(issue)}{issue.get('description', 'No description')}{_location_suffix(issue)}\n"
+                for i, issue in enumerate(issues, 1)
+            ))
+            body.write("\n")
 
         # Fixes in compact format
         if fixes:
-            body_parts.append("**Changes Applied**:\n")
-            for i, fix in enumerate(fixes, 1):
-                if isinstance(fix, dict):
-                    fix_desc = fix.get("fix", "No description")
-                    body_parts.append(f"{i}. {fix_desc}\n")
-                else:
-                    body_parts.append(f"{i}. {fix}\n")
-            body_parts.append("\n")
+            body.write("**Changes Applied**:\n")
+            body.writelines((
+                f"{i}. {fix.get('fix', 'No description')}\n" for i, fix in enumerate(fixes, 1)
+            ))
+            body.write("\n")
 
         # Expected improvement
         if expected:
-            body_parts.append(f"**Expected Impact**: {expected}\n")
+            body.write(f"**Expected Impact**: {expected}\n")
 
-    def _add_risk_assessment_section(self, body_parts: list, risk_assessment: Dict[str, Any]) -> None:
+    def _add_risk_assessment_section(self, body: io.StringIO, risk_assessment: Dict[str, Any]) -> None:
         """Add compact risk assessment to PR body."""
-        body_parts.append("\n---\n\n## Risk Assessment\n\n")
+        body.write(PR_RISK_HEADER)
         
         risk_score = risk_assessment.get("risk_score", 0)
         overall_risk = risk_assessment.get("overall_risk", "unknown").upper()
@@ -548,7 +893,7 @@ class Resolver(BaseService):
         merge_status = "Safe" if safe_merge else "Review required"
         approval_status = "Manual approval needed" if manual_approval else "Auto-merge allowed"
         
-        body_parts.append(
+        body.write(
             f"**Risk Score**: {risk_score_scaled}/100 ({overall_risk}) | "
             f"**Merge**: {merge_status} | "
             f"**Approval**: {approval_status}\n"
@@ -556,11 +901,11 @@ class Resolver(BaseService):
 
         # Breaking changes (compact)
         if breaking_changes:
-            body_parts.append(f"\n**Breaking Changes** ({len(breaking_changes)}): {', '.join(breaking_changes[:3])}")
+            body.write(f"\n**Breaking Changes** ({len(breaking_changes)}): {', '.join(breaking_changes[:3])}")
             if len(breaking_changes) > 3:
-                body_parts.append(f" *+{len(breaking_changes) - 3} more*")
-            body_parts.append("\n")
+                body.write(f" *+{len(breaking_changes) - 3} more*")
+            body.write("\n")
 
         # Affected components (compact)
         if affected:
-            body_parts.append(f"**Affected**: {', '.join(affected)}\n")
\ No newline at end of file
+            body.write(f"**Affected**: {', '.join(affected)}\n")
\ No newline at end of file
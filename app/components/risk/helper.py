@@ -0,0 +1,37 @@
+"""
+Risk helpers - schema for the LLM's risk assessment response.
+"""
+
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, field_validator
+
+
+class RiskAssessment(BaseModel):
+    """
+    Risk assessment as returned by the LLM, with defaults for missing fields.
+
+    Lenient like the checks it replaces: a risk score that isn't a number
+    becomes None (the caller falls back to the heuristic score) and risks or
+    recommendations that aren't lists become empty lists. Level and score
+    consistency is left to the caller.
+    """
+
+    overall_risk: Any = "medium"
+    risk_score: Optional[float] = 5.0
+    risks: List[Any] = []
+    recommendations: List[Any] = []
+    analysis: Any = "No detailed analysis provided"
+
+    @field_validator("risk_score", mode="before")
+    @classmethod
+    def _number_or_none(cls, value: Any) -> Optional[float]:
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return None
+
+    @field_validator("risks", "recommendations", mode="before")
+    @classmethod
+    def _list_or_empty(cls, value: Any) -> List[Any]:
+        return value if isinstance(value, list) else []
@@ -43,6 +43,30 @@ RISK_ASSESSOR_SYSTEM_PROMPT = """You are a DevOps risk assessment expert analyzi
   Be specific and actionable in your recommendations.
   """
 
+# Batch variant: several contexts in one request, answered as one JSON object
+RISK_ASSESSOR_BATCH_SYSTEM_PROMPT = RISK_ASSESSOR_SYSTEM_PROMPT + """
+  You may receive several risk assessment requests in one message, each introduced by a
+  "---ASSESSMENT n---" marker. Assess each one independently and respond with a single JSON
+  object {"assessments": [...]} holding one assessment in the format above per request,
+  in the same order as the requests.
+  """
+
+RISK_BATCH_MARKER = "---ASSESSMENT %d---"
+
+# Static closing section of the risk context, appended as-is to every request
+RISK_TASK_TAIL = """## Your Task
+            Analyze these changes and provide a comprehensive risk assessment. Consider:
+            1. What could break or behave unexpectedly?
+            2. What security implications exist?
+            3. What testing should be done before merging?
+            4. Are there any rollback considerations?
+
+            Provide specific, actionable recommendations.
+        """
+
+# Only the head of each pipeline is shown, the fixes list carries the detail
+YAML_PREVIEW_CHARS = 1000
+
 
 def build_risk_context(
         issues: List[Dict[str, Any]],
@@ -65,17 +89,20 @@ def build_risk_context(
             Formatted context string
         """
         # Format issues
-        issues_text = "\n".join([
-            f"- {i+1}. [{issue.get('severity', 'medium').upper()}] {issue['type']}: "
+        issues_text = "\n".join(
+            f"- {i}. [{issue.get('severity', 'medium').upper()}] {issue['type']}: "
             f"{issue['description']} (at {issue.get('location', 'unknown')})"
-            for i, issue in enumerate(issues)
-        ])
+            for i, issue in enumerate(issues, 1)
+        )
         
         # Format fixes
-        fixes_text = "\n".join([
-            f"- {i+1}. {fix.get('fix', fix.get('description', str(fix)))}"
-            for i, fix in enumerate(fixes)
-        ])
+        fixes_text = "\n".join(
+            f"- {i}. {fix.get('fix', fix.get('description', str(fix)))}"
+            for i, fix in enumerate(fixes, 1)
+        )
+        
+        original_preview = original_yaml[:YAML_PREVIEW_CHARS]
+        optimised_preview = optimised_yaml[:YAML_PREVIEW_CHARS]
         
         # Build context
         context = f"""# Risk Assessment Request
@@ -95,22 +122,30 @@ def build_risk_context(
 
             ### Original Pipeline (first 1000 chars)
             ```yaml
-            {original_yaml[:1000]}
+            {original_preview}
             ```
 
             ### optimised Pipeline (first 1000 chars)
             ```yaml
-            {optimised_yaml[:1000]}
+            {optimised_preview}
             ```
 
-            ## Your Task
-            Analyze these changes and provide a comprehensive risk assessment. Consider:
-            1. What could break or behave unexpectedly?
-            2. What security implications exist?
-            3. What testing should be done before merging?
-            4. Are there any rollback considerations?
+            {RISK_TASK_TAIL}"""
+        
+        return context
 
-            Provide specific, actionable recommendations.
-        """
+
+def build_batch_risk_context(contexts: List[str]) -> str:
+    """
+    Join several risk contexts into one batch request.
+    
+    Args:
+        contexts: Contexts from build_risk_context, in assessment order
         
-        return context
\ No newline at end of file
+    Returns:
+        Contexts separated by numbered RISK_BATCH_MARKER lines
+    """
+    return "\n\n".join(
+        f"{RISK_BATCH_MARKER % i}\n\n{context}"
+        for i, context in enumerate(contexts, 1)
+    )
@@ -2,17 +2,60 @@
 Risk Assessor - Evaluates risk of applied pipeline optimisations.
 """
 
-from typing import Dict, Any, List, Optional
+import bisect
+import json
+import re
+from typing import Dict, Any, Final, List, Optional, Pattern, Union
+
+from pydantic import ValidationError
 
 from app.components.base_service import BaseService
 from app.utils.logger import get_logger
+from app.utils.cache_utils import ResultCache, content_key
 from app.llm.llm_client import LLMClient
 from app.config import config
 from app.exceptions import RiskAssessorError
-from app.components.risk.prompt import RISK_ASSESSOR_SYSTEM_PROMPT, build_risk_context
+from app.components.risk.helper import RiskAssessment
+from app.components.risk.prompt import (
+    RISK_ASSESSOR_SYSTEM_PROMPT,
+    RISK_ASSESSOR_BATCH_SYSTEM_PROMPT,
+    build_risk_context,
+    build_batch_risk_context
+)
 
 logger = get_logger(__name__, "RiskAssessor")
 
+# Risk score lower bounds and the level for each band (bisect_right over the bounds)
+RISK_LEVEL_THRESHOLDS = (4, 7)
+RISK_LEVELS = ("low", "medium", "high")
+
+# Score added per detected issue, by severity (unknown severities count as medium)
+SEVERITY_WEIGHTS = {"high": 1.5, "medium": 1.0, "low": 0.5}
+
+# Keywords that make a fix riskier, in priority order (the first one present sets the weight)
+RISKY_KEYWORDS = {
+    "security": 2.0,
+    "deploy": 1.5,
+    "authentication": 2.0,
+    "credential": 2.0,
+    "permission": 1.5,
+    "docker": 1.0,
+    "production": 1.5
+}
+# All keywords in one alternation, so each fix is scanned once instead of once per keyword
+RISKY_KEYWORD_PATTERN: Final[Pattern[str]] = re.compile("|".join(map(re.escape, RISKY_KEYWORDS)))
+
+# Assessments are deterministic (temperature 0) for the same inputs, so repeat runs reuse them
+ASSESSMENT_CACHE_SIZE = 128
+assessment_cache = ResultCache(max_entries=ASSESSMENT_CACHE_SIZE)
+
+
+def _fix_text(fix: Any) -> str:
+    """Lowercased text of a fix's values (issue, fix, location), without the dict repr around them."""
+    if isinstance(fix, dict):
+        return " ".join(value if isinstance(value, str) else str(value) for value in fix.values()).lower()
+    return str(fix).lower()
+
 
 class RiskAssessor(BaseService):
     """Risk assessment service that evaluates applied pipeline optimisations."""
@@ -24,11 +67,14 @@ class RiskAssessor(BaseService):
         self.model = model or cfg["model"]
         self.temperature = temperature if temperature is not None else cfg["temperature"]
         self.max_tokens = max_tokens or cfg["max_tokens"]
+        self.skip_llm_below = cfg["skip_llm_below"]
         
         self.llm_client = LLMClient(model=self.model, temperature=self.temperature)
         
         logger.debug(
-            f"Initialised Risk Assessor: model={self.model}, temperature={self.temperature}",
+            "Initialised Risk Assessor: model=%s, temperature=%s",
+            self.model,
+            self.temperature,
             correlation_id="INIT"
         )
 
@@ -53,14 +99,35 @@ class RiskAssessor(BaseService):
                 "analysis": "No optimisations were applied, so there is no risk from changes."
             }
         
+        key = self._cache_key(issues_detected, applied_fixes, original_yaml, optimised_yaml)
+        cached = assessment_cache.get(key)
+        if cached is not None:
+            logger.debug("Using cached risk assessment", correlation_id=correlation_id)
+            return cached
+        
         logger.debug(
-            f"Assessing risk for {len(applied_fixes)} applied changes",
+            "Assessing risk for %d applied changes",
+            len(applied_fixes),
             correlation_id=correlation_id
         )
         
         try:
             heuristic_score = self._calculate_heuristic_risk(issues_detected, applied_fixes)
             
+            # One or two fixes score 1.0 and any risky keyword adds at least 1.0, so below 2.0
+            # means one or two keyword-free fixes with at most a low-severity issue: trivial
+            # changes the LLM would only confirm as low risk
+            if heuristic_score < self.skip_llm_below:
+                logger.info(
+                    "Heuristic risk %.1f below %s, skipping LLM assessment",
+                    heuristic_score,
+                    self.skip_llm_below,
+                    correlation_id=correlation_id
+                )
+                assessment = self._heuristic_assessment(heuristic_score, applied_fixes, correlation_id)
+                assessment_cache.put(key, assessment)
+                return assessment
+            
             context = build_risk_context(
                 issues_detected,
                 applied_fixes,
@@ -72,10 +139,16 @@ class RiskAssessor(BaseService):
             raw_response = self.llm_client.chat_completion(
                 system_prompt=RISK_ASSESSOR_SYSTEM_PROMPT,
                 user_prompt=context,
-                max_tokens=self.max_tokens
+                max_tokens=self.max_tokens,
+                cache_system_prompt=True
             )
             
-            assessment = self.llm_client.parse_json_response(raw_response, correlation_id)
+            try:
+                # Bare JSON is parsed and validated in one pass
+                assessment = RiskAssessment.model_validate_json(raw_response)
+            except ValidationError:
+                # Fenced or wrapped in prose, extract it first
+                assessment = self.llm_client.parse_json_response(raw_response, correlation_id)
             assessment = self._validate_and_enhance_assessment(
                 assessment,
                 heuristic_score,
@@ -84,21 +157,138 @@ class RiskAssessor(BaseService):
             )
             
             logger.info(
-                f"Risk assessment complete: {assessment['overall_risk'].upper()} risk "
-                f"(score: {assessment['risk_score']}/10) for {len(applied_fixes)} changes",
+                "Risk assessment complete: %s risk (score: %s/10) for %d changes",
+                assessment["overall_risk"].upper(),
+                assessment["risk_score"],
+                len(applied_fixes),
                 correlation_id=correlation_id
             )
             
+            assessment_cache.put(key, assessment)
             return assessment
             
         except RiskAssessorError as e:
-            logger.error(f"Risk assessment failed: {e}", correlation_id=correlation_id)
+            logger.error("Risk assessment failed: %s", e, correlation_id=correlation_id)
             raise
         except Exception as e:
             error_msg = f"Failed to assess risk: {e}"
             logger.error(error_msg, correlation_id=correlation_id)
             raise RiskAssessorError(error_msg)
 
+    def run_batch(
+        self,
+        state: Dict[str, Any],
+        items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Assess several pipelines' optimisations with one LLM request.
+        
+        Items that need no LLM (no fixes, or a heuristic score below the skip
+        threshold) are answered by run() directly. If the batch response can't
+        be matched to the remaining items, they fall back to one run() each.
+        
+        Args:
+            state: Workflow state (for the correlation ID)
+            items: Dicts with run()'s issues_detected, applied_fixes,
+                original_yaml and optimised_yaml arguments
+            
+        Returns:
+            One assessment per item, in order
+        """
+        correlation_id = state.get("correlation_id")
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        pending: List[int] = []
+        scores: List[float] = []
+        
+        for i, item in enumerate(items):
+            cached = assessment_cache.get(self._cache_key(**item))
+            if cached is not None:
+                results[i] = cached
+                continue
+            fixes = item["applied_fixes"]
+            score = self._calculate_heuristic_risk(item["issues_detected"], fixes) if fixes else 0.0
+            if not fixes or score < self.skip_llm_below:
+                results[i] = self.run(state, **item)
+            else:
+                pending.append(i)
+                scores.append(score)
+        
+        if len(pending) == 1:
+            results[pending[0]] = self.run(state, **items[pending[0]])
+        elif pending:
+            assessments = self._assess_batch([items[i] for i in pending], scores, correlation_id)
+            if assessments is None:
+                for i in pending:
+                    results[i] = self.run(state, **items[i])
+            else:
+                for i, score, assessment in zip(pending, scores, assessments):
+                    results[i] = self._validate_and_enhance_assessment(
+                        assessment, score, items[i]["applied_fixes"], correlation_id
+                    )
+                    assessment_cache.put(self._cache_key(**items[i]), results[i])
+        
+        return results
+
+    def _cache_key(
+        self,
+        issues_detected: List[Dict[str, Any]],
+        applied_fixes: List[Dict[str, Any]],
+        original_yaml: str,
+        optimised_yaml: str
+    ) -> str:
+        """Digest everything an assessment depends on: model, issues, fixes and both pipelines."""
+        return content_key(
+            self.model,
+            json.dumps(issues_detected, sort_keys=True, default=str),
+            json.dumps(applied_fixes, sort_keys=True, default=str),
+            original_yaml or "",
+            optimised_yaml or ""
+        )
+
+    def _assess_batch(
+        self,
+        items: List[Dict[str, Any]],
+        heuristic_scores: List[float],
+        correlation_id: Optional[str] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Send the items' contexts in one request, returning None if the response doesn't fit them."""
+        contexts = [
+            build_risk_context(
+                item["issues_detected"],
+                item["applied_fixes"],
+                item["original_yaml"],
+                item["optimised_yaml"],
+                score
+            )
+            for item, score in zip(items, heuristic_scores)
+        ]
+        logger.debug("Assessing risk for %d pipelines in one request", len(items), correlation_id=correlation_id)
+        
+        try:
+            raw_response = self.llm_client.chat_completion(
+                system_prompt=RISK_ASSESSOR_BATCH_SYSTEM_PROMPT,
+                user_prompt=build_batch_risk_context(contexts),
+                max_tokens=self.max_tokens * len(items),
+                cache_system_prompt=True
+            )
+            assessments = self.llm_client.parse_json_response(raw_response, correlation_id).get("assessments")
+        except Exception as e:
+            logger.warning("Batch risk assessment failed, assessing one by one: %s", e, correlation_id=correlation_id)
+            return None
+        
+        if (
+            not isinstance(assessments, list)
+            or len(assessments) != len(items)
+            or not all(isinstance(assessment, dict) for assessment in assessments)
+        ):
+            logger.warning(
+                "Batch risk response did not hold %d assessments, assessing one by one",
+                len(items),
+                correlation_id=correlation_id
+            )
+            return None
+        return assessments
+
     def _calculate_heuristic_risk(
         self, 
         issues: List[Dict[str, Any]], 
@@ -115,82 +305,85 @@ class RiskAssessor(BaseService):
         elif num_fixes >= 1:
             score += 1
         
-        severity_weights = {"high": 1.5, "medium": 1.0, "low": 0.5}
         for issue in issues:
             severity = issue.get("severity", "medium").lower()
-            score += severity_weights.get(severity, 1.0)
-        
-        risky_keywords = {
-            "security": 2.0,
-            "deploy": 1.5,
-            "authentication": 2.0,
-            "credential": 2.0,
-            "permission": 1.5,
-            "docker": 1.0,
-            "production": 1.5
-        }
+            score += SEVERITY_WEIGHTS.get(severity, 1.0)
         
         for fix in fixes:
-            fix_text = str(fix).lower()
-            for keyword, weight in risky_keywords.items():
-                if keyword in fix_text:
-                    score += weight
-                    break
+            found = set(RISKY_KEYWORD_PATTERN.findall(_fix_text(fix)))
+            if found:
+                score += next(weight for keyword, weight in RISKY_KEYWORDS.items() if keyword in found)
         
         return min(10.0, max(0.0, score))
 
+    def _heuristic_assessment(
+        self,
+        heuristic_score: float,
+        applied_fixes: List[Dict[str, Any]],
+        correlation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build a low-risk assessment from the heuristic score alone, in the validated shape."""
+        return self._validate_and_enhance_assessment(
+            {
+                "overall_risk": "low",
+                "risk_score": heuristic_score,
+                "risks": [],
+                "analysis": (
+                    f"{len(applied_fixes)} low-impact change(s) with no risky keywords; "
+                    "assessed heuristically without an LLM review."
+                )
+            },
+            heuristic_score,
+            applied_fixes,
+            correlation_id
+        )
+
     def _validate_and_enhance_assessment(
         self, 
-        assessment: Dict[str, Any],
+        assessment: Union[Dict[str, Any], RiskAssessment],
         heuristic_score: float,
         applied_fixes: List[Dict[str, Any]],
         correlation_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Validate and enhance risk assessment with additional logic."""
-        validated = {
-            "overall_risk": assessment.get("overall_risk", "medium"),
-            "risk_score": assessment.get("risk_score", 5.0),
-            "risks": assessment.get("risks", []),
-            "recommendations": assessment.get("recommendations", []),
-            "analysis": assessment.get("analysis", "No detailed analysis provided"),
-            "changes_count": len(applied_fixes),
-            "heuristic_score": heuristic_score
-        }
+        if not isinstance(assessment, RiskAssessment):
+            assessment = RiskAssessment.model_validate(assessment)
+        validated = assessment.model_dump()
+        validated["changes_count"] = len(applied_fixes)
+        validated["heuristic_score"] = heuristic_score
         
         valid_levels = ["low", "medium", "high"]
         if validated["overall_risk"] not in valid_levels:
             logger.warning(
-                f"Invalid risk level '{validated['overall_risk']}', defaulting to 'medium'",
+                "Invalid risk level '%s', defaulting to 'medium'",
+                validated["overall_risk"],
                 correlation_id=correlation_id
             )
             validated["overall_risk"] = "medium"
         
-        try:
-            risk_score = float(validated["risk_score"])
-            validated["risk_score"] = max(0, min(10, risk_score))
-        except (ValueError, TypeError):
+        if validated["risk_score"] is None:
             logger.warning(
-                f"Invalid risk score '{validated['risk_score']}', using heuristic: {heuristic_score}",
+                "Invalid risk score, using heuristic: %s",
+                heuristic_score,
                 correlation_id=correlation_id
             )
             validated["risk_score"] = heuristic_score
+        else:
+            validated["risk_score"] = max(0, min(10, validated["risk_score"]))
         
         score = validated["risk_score"]
-        expected_level = "low" if score < 4 else "medium" if score < 7 else "high"
+        expected_level = RISK_LEVELS[bisect.bisect_right(RISK_LEVEL_THRESHOLDS, score)]
         
         if validated["overall_risk"] != expected_level:
             logger.debug(
-                f"Adjusting risk level from {validated['overall_risk']} to {expected_level} "
-                f"to match score {score}",
+                "Adjusting risk level from %s to %s to match score %s",
+                validated["overall_risk"],
+                expected_level,
+                score,
                 correlation_id=correlation_id
             )
             validated["overall_risk"] = expected_level
         
-        if not isinstance(validated["risks"], list):
-            validated["risks"] = []
-        if not isinstance(validated["recommendations"], list):
-            validated["recommendations"] = []
-        
         if not validated["recommendations"]:
             validated["recommendations"] = [
                 "Test the optimised pipeline in a non-production environment",
@@ -257,13 +450,15 @@ class RiskAssessor(BaseService):
                 logger.debug("Risk assessment saved to database", correlation_id=correlation_id)
             except Exception as e:
                 logger.warning(
-                    f"Failed to save risk assessment to database: {str(e)[:200]}",
+                    "Failed to save risk assessment to database: %.200s",
+                    e,
                     correlation_id=correlation_id
                 )
                 
         except Exception as e:
             logger.error(
-                f"Risk assessment execution failed: {e}",
+                "Risk assessment execution failed: %s",
+                e,
                 correlation_id=correlation_id
             )
             state["risk_assessment"] = {
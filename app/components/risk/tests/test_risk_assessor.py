@@ -1,17 +1,26 @@
+import json
+
 import pytest
 from unittest.mock import patch, MagicMock
-from app.components.risk.risk_assessor import RiskAssessor, RiskAssessorError
+from app.components.risk.risk_assessor import RiskAssessor, RiskAssessorError, assessment_cache
 
 
 # Fixtures
-@pytest.fixture
+@pytest.fixture(scope="module")
 def assessor():
     with patch("app.components.risk.risk_assessor.LLMClient") as mock_llm:
         mock_llm.return_value.chat_completion.return_value = '{"overall_risk":"medium","risk_score":5,"risks":[],"recommendations":[],"analysis":"ok"}'
-        mock_llm.return_value.parse_json_response.side_effect = lambda resp, cid: eval(resp)
+        mock_llm.return_value.parse_json_response.side_effect = lambda resp, cid: json.loads(resp)
         yield RiskAssessor(model="test-model", temperature=0.1, max_tokens=50)
 
 
+@pytest.fixture(autouse=True)
+def clear_assessment_cache():
+    assessment_cache.clear()
+    yield
+    assessment_cache.clear()
+
+
 # Tests
 def test_calculate_heuristic_risk(assessor):
     """Heuristic risk score increases with severity and risky keywords."""
@@ -20,6 +29,12 @@ def test_calculate_heuristic_risk(assessor):
     score = assessor._calculate_heuristic_risk(issues, fixes)
     assert 0 < score <= 10
 
+def test_heuristic_risk_keyword_priority(assessor):
+    """A fix counts once, weighted by its highest-priority keyword rather than the first in the text."""
+    assert assessor._calculate_heuristic_risk([], [{"fix": "production docker image"}]) == 1 + 1.0
+    assert assessor._calculate_heuristic_risk([], [{"fix": "docker security scan"}]) == 1 + 2.0
+    assert assessor._calculate_heuristic_risk([], [{"fix": "add caching"}]) == 1
+
 def test_run_returns_assessment(assessor):
     """run() returns a structured assessment dict."""
     state = {"correlation_id": "cid"}
@@ -31,6 +46,24 @@ def test_run_returns_assessment(assessor):
     assert "recommendations" in result
     assert "analysis" in result
 
+def test_run_skips_llm_for_trivial_changes(assessor):
+    """run() answers from the heuristic alone when the score is below the skip threshold."""
+    calls = assessor.llm_client.chat_completion.call_count
+    result = assessor.run({"correlation_id": "cid"}, [], [{"fix": "add caching"}], "orig", "optimised")
+    assert assessor.llm_client.chat_completion.call_count == calls
+    assert result["overall_risk"] == "low"
+    assert result["risk_score"] == result["heuristic_score"] == 1.0
+    assert result["recommendations"]
+
+def test_run_skips_llm_for_two_trivial_fixes(assessor):
+    """Two keyword-free fixes with no issues also score 1.0 and skip the LLM."""
+    calls = assessor.llm_client.chat_completion.call_count
+    fixes = [{"fix": "add caching"}, {"fix": "pin action version"}]
+    result = assessor.run({"correlation_id": "cid"}, [], fixes, "orig", "optimised")
+    assert assessor.llm_client.chat_completion.call_count == calls
+    assert result["risk_score"] == result["heuristic_score"] == 1.0
+    assert result["changes_count"] == 2
+
 def test_execute_handles_no_optimisation(assessor):
     """_execute sets low risk when no optimisation result is present."""
     state = {"run_id": "r1", "correlation_id": "cid"}
@@ -56,3 +89,67 @@ def test_run_returns_zero_risk_for_no_fixes(assessor):
     assert result["overall_risk"] == "low"
     assert result["risk_score"] == 0
     assert "No changes were applied" in result["recommendations"][0]
+
+def test_run_batch_assesses_in_one_request():
+    """run_batch() sends LLM-worthy items in one request and answers trivial ones locally."""
+    with patch("app.components.risk.risk_assessor.LLMClient") as mock_llm:
+        mock_llm.return_value.chat_completion.return_value = json.dumps({"assessments": [
+            {"overall_risk": "high", "risk_score": 8, "risks": [], "recommendations": ["a"], "analysis": "first"},
+            {"overall_risk": "medium", "risk_score": 5, "risks": [], "recommendations": ["b"], "analysis": "second"}
+        ]})
+        mock_llm.return_value.parse_json_response.side_effect = lambda resp, cid: json.loads(resp)
+        batch_assessor = RiskAssessor(model="test-model", temperature=0.1, max_tokens=50)
+
+    risky = {"issues_detected": [{"severity": "high", "type": "t", "description": "d"}],
+             "applied_fixes": [{"fix": "deploy change"}], "original_yaml": "o", "optimised_yaml": "p"}
+    trivial = {"issues_detected": [], "applied_fixes": [{"fix": "add caching"}], "original_yaml": "o", "optimised_yaml": "p"}
+    results = batch_assessor.run_batch({"correlation_id": "cid"}, [risky, trivial, risky])
+
+    mock_llm.return_value.chat_completion.assert_called_once()
+    assert "---ASSESSMENT 2---" in mock_llm.return_value.chat_completion.call_args.kwargs["user_prompt"]
+    assert [r["analysis"] for r in (results[0], results[2])] == ["first", "second"]
+    assert results[1]["risk_score"] == 1.0
+
+def test_run_batch_falls_back_to_single_runs():
+    """A batch response with the wrong number of assessments falls back to one run() per item."""
+    single = '{"overall_risk":"medium","risk_score":5,"risks":[],"recommendations":[],"analysis":"single"}'
+    with patch("app.components.risk.risk_assessor.LLMClient") as mock_llm:
+        mock_llm.return_value.chat_completion.side_effect = ['{"assessments": []}', single, single]
+        mock_llm.return_value.parse_json_response.side_effect = lambda resp, cid: json.loads(resp)
+        batch_assessor = RiskAssessor(model="test-model", temperature=0.1, max_tokens=50)
+
+    item = {"issues_detected": [{"severity": "high", "type": "t", "description": "d"}],
+            "applied_fixes": [{"fix": "deploy change"}], "original_yaml": "o", "optimised_yaml": "p"}
+    results = batch_assessor.run_batch({"correlation_id": "cid"}, [item, dict(item, optimised_yaml="q")])
+
+    assert mock_llm.return_value.chat_completion.call_count == 3
+    assert [r["analysis"] for r in results] == ["single", "single"]
+
+def test_run_reuses_cached_assessment(assessor):
+    """A repeat run() with the same inputs is answered from the cache without an LLM call."""
+    issues = [{"severity": "high", "type": "t", "description": "d"}]
+    fixes = [{"fix": "deploy to production"}]
+    first = assessor.run({"correlation_id": "cid"}, issues, fixes, "orig", "cached")
+    calls = assessor.llm_client.chat_completion.call_count
+    first["overall_risk"] = "mutated"
+    second = assessor.run({"correlation_id": "cid"}, issues, fixes, "orig", "cached")
+    assert assessor.llm_client.chat_completion.call_count == calls
+    assert second["overall_risk"] == "medium"
+    assert assessment_cache.stats()["hits"] == 1
+
+def test_run_extracts_fenced_assessment():
+    """run() falls back to JSON extraction when the response isn't bare JSON, coercing a string score."""
+    fenced = {"overall_risk": "high", "risk_score": "8", "risks": "none", "analysis": "fenced"}
+    with patch("app.components.risk.risk_assessor.LLMClient") as mock_llm:
+        mock_llm.return_value.chat_completion.return_value = "```json\n" + json.dumps(fenced) + "\n```"
+        mock_llm.return_value.parse_json_response.return_value = fenced
+        fenced_assessor = RiskAssessor(model="test-model", temperature=0.1, max_tokens=50)
+
+    issues = [{"severity": "high", "type": "t", "description": "d"}]
+    result = fenced_assessor.run({"correlation_id": "cid"}, issues, [{"fix": "deploy change"}], "o", "p")
+
+    mock_llm.return_value.parse_json_response.assert_called_once()
+    assert result["risk_score"] == 8.0
+    assert result["overall_risk"] == "high"
+    assert result["risks"] == []
+    assert result["analysis"] == "fenced"
@@ -0,0 +1,86 @@
+"""
+Scanner helpers - multi-pattern matching for the regex-based security checks.
+"""
+
+import re
+import threading
+from typing import Iterable, List, Optional
+
+try:
+    # Optional: Hyperscan matches every pattern in one SIMD-accelerated DFA pass
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+class PatternSet:
+    """
+    Case-insensitive matcher for a fixed group of patterns, answering whether any of them matches.
+
+    Uses a Hyperscan block-mode database when the hyperscan package is installed
+    and every pattern compiles under it, otherwise one `re` alternation with a
+    group per pattern. Either way the text is scanned once per check. On the
+    `re` path, an optional literal prefilter rejects text that can't match
+    with a few C substring searches instead of the regex scan.
+    """
+
+    def __init__(self, patterns: Iterable[str], prefilter: Iterable[str] = ()):
+        """
+        Compile patterns.
+
+        Args:
+            patterns: Regular expressions using syntax common to `re` and Hyperscan
+            prefilter: Lowercase literals, one of which every match contains
+                (empty to always run the matcher)
+        """
+        self.patterns = tuple(patterns)
+        self.prefilter = tuple(prefilter)
+        self._regex = re.compile("|".join(f"({pattern})" for pattern in self.patterns), re.IGNORECASE)
+        self._database = self._compile_database(self.patterns)
+        # Hyperscan scratch space can't be shared by concurrent scans, keep one per thread
+        self._local = threading.local()
+
+    @staticmethod
+    def _compile_database(patterns: tuple) -> Optional["hyperscan.Database"]:
+        """Build the Hyperscan database, or None to use the `re` path."""
+        if hyperscan is None:
+            return None
+        try:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=[pattern.encode("utf-8") for pattern in patterns],
+                ids=list(range(len(patterns))),
+                elements=len(patterns),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(patterns)
+            )
+            return database
+        except hyperscan.error:
+            return None
+
+    def first_match(self, text: str) -> Optional[int]:
+        """Return the index of a pattern that matches text, or None if none does."""
+        if self._database is None:
+            if self.prefilter:
+                lowered = text.lower()
+                if not any(literal in lowered for literal in self.prefilter):
+                    return None
+            match = self._regex.search(text)
+            return match.lastindex - 1 if match else None
+
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self._database)
+
+        hits: List[int] = []
+
+        def on_match(pattern_id, start, end, flags, context):
+            hits.append(pattern_id)
+            return True  # one hit answers the check, stop scanning
+
+        try:
+            self._database.scan(text.encode("utf-8"), match_event_handler=on_match, scratch=scratch)
+        except hyperscan.error:
+            # Terminating from the callback surfaces as an error
+            if not hits:
+                raise
+        return hits[0] if hits else None
@@ -2,16 +2,56 @@
 Security Scanner Agent - Scans CI/CD pipelines for security vulnerabilities
 """
 
+import logging
 import re
 import yaml
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Final, Optional, List, Pattern, Tuple
 
 from app.components.base_service import BaseService
 from app.utils.logger import get_logger
 from app.exceptions import SecurityScanError
+from app.components.scan.helper import PatternSet
+from app.utils.yaml_utils import YamlLoader
+from app.utils.cache_utils import ResultCache, content_key
 
 logger = get_logger(__name__, "SecurityScanner")
 
+# Commands that could print secrets to the job log
+SECRETS_PATTERNS: Final[Tuple[str, ...]] = (
+    r'echo\s+\$.*PASSWORD',
+    r'echo\s+\$.*TOKEN',
+    r'echo\s+\$.*SECRET',
+    r'echo\s+\$.*KEY',
+    r'echo\s+\$.*API_KEY',
+    r'set\s+-x.*\$.*PASSWORD',
+    r'set\s+-x.*\$.*TOKEN',
+    r'set\s+-x.*\$.*SECRET',
+    r'printenv',
+    r'env\s*\|',
+)
+
+# Dangerous shell commands
+UNSAFE_COMMAND_PATTERNS: Final[Tuple[str, ...]] = (
+    r'curl\s+.*\|\s*bash',
+    r'wget\s+.*\|\s*sh',
+    r'eval\s+\$',
+    r'rm\s+-rf\s+/',
+    r'chmod\s+777',
+)
+# A literal each unsafe command contains, so clean pipelines skip the regex scan
+UNSAFE_COMMAND_LITERALS: Final[Tuple[str, ...]] = ("curl", "wget", "eval", "-rf", "chmod")
+
+# sudo as a command word, matched in C without lower-casing each step's script
+SUDO_PATTERN: Final[Pattern[str]] = re.compile(r'\bsudo\b', re.IGNORECASE)
+
+# Scan results are pure in the YAML text, so retries and repeat runs reuse them
+SCAN_CACHE_SIZE = 128
+scan_cache = ResultCache(max_entries=SCAN_CACHE_SIZE)
+
+# Each check scans the YAML once for its whole group
+SECRETS_MATCHER: Final[PatternSet] = PatternSet(SECRETS_PATTERNS)
+UNSAFE_COMMAND_MATCHER: Final[PatternSet] = PatternSet(UNSAFE_COMMAND_PATTERNS, prefilter=UNSAFE_COMMAND_LITERALS)
+
 
 class SecurityScanner(BaseService):
     """
@@ -31,7 +71,7 @@ class SecurityScanner(BaseService):
         """Initialise SecurityScanner with security check registry."""
         super().__init__(agent_name="security_scan")
         
-        # Registry of security checks
+        # Registry of security checks, critical ones first so fast_fail can stop at them
         self.checks = {
             "secrets_exposed": self._check_secrets_exposure,
             "unsafe_commands": self._check_unsafe_commands,
@@ -41,13 +81,20 @@ class SecurityScanner(BaseService):
         
         logger.debug("Initialised SecurityScanner", correlation_id="INIT")
 
-    def run(self, pipeline_yaml: str, correlation_id: Optional[str] = None) -> Dict[str, Any]:
+    def run(
+        self,
+        pipeline_yaml: str,
+        correlation_id: Optional[str] = None,
+        fast_fail: bool = False
+    ) -> Dict[str, Any]:
         """
         Scan pipeline YAML for security vulnerabilities.
         
         Args:
             pipeline_yaml: YAML content to scan
             correlation_id: Request correlation ID
+            fast_fail: Stop at the first critical vulnerability, reporting only
+                the checks run so far
             
         Returns:
             Dictionary containing:
@@ -63,13 +110,24 @@ class SecurityScanner(BaseService):
         if not pipeline_yaml or not isinstance(pipeline_yaml, str):
             raise SecurityScanError("pipeline_yaml must be a non-empty string")
         
+        key = content_key(pipeline_yaml)
+        cached = scan_cache.get(key)
+        if cached is not None:
+            logger.debug("Using cached security scan", correlation_id=correlation_id)
+            return cached
+        
         logger.debug("Starting security scan", correlation_id=correlation_id)
         
-        # Run all security checks
-        security_checks = {
-            name: check_fn(pipeline_yaml, correlation_id)
-            for name, check_fn in self.checks.items()
-        }
+        # Parse once for the structural checks, the pattern checks read the raw text
+        parsed = self._parse_yaml(pipeline_yaml, correlation_id)
+        
+        # Run security checks
+        security_checks = {}
+        for name, check_fn in self.checks.items():
+            security_checks[name] = check_fn(pipeline_yaml, parsed, correlation_id)
+            if fast_fail and security_checks[name] and name in self.CRITICAL_VULNERABILITIES:
+                logger.debug("Stopping scan at critical vulnerability: %s", name, correlation_id=correlation_id)
+                break
 
         # Collect vulnerabilities
         vulnerabilities = [k for k, v in security_checks.items() if v]
@@ -83,13 +141,19 @@ class SecurityScanner(BaseService):
 
         # Log results
         if vulnerabilities:
-            logger.warning(
-                f"Security scan failed: {len(vulnerabilities)} vulnerabilities found - {', '.join(vulnerabilities)}",
-                correlation_id=correlation_id
-            )
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    "Security scan failed: %d vulnerabilities found - %s",
+                    len(vulnerabilities),
+                    ", ".join(vulnerabilities),
+                    correlation_id=correlation_id
+                )
         else:
             logger.info("Security scan passed - no vulnerabilities detected", correlation_id=correlation_id)
 
+        # Only full reports are cached, they answer fast_fail runs as well
+        if len(security_checks) == len(self.checks):
+            scan_cache.put(key, result)
         return result
 
     def _execute(self, state: Dict[str, Any]) -> Dict[str, Any]:
@@ -106,7 +170,8 @@ class SecurityScanner(BaseService):
         yaml_content = state.get("pipeline_yaml", "")
         
         try:
-            scan_result = self.run(yaml_content, correlation_id)
+            # A critical vulnerability stops the workflow, the remaining checks would go unused
+            scan_result = self.run(yaml_content, correlation_id, fast_fail=True)
             state["security_scan"] = scan_result
 
             # Handle vulnerabilities
@@ -117,7 +182,8 @@ class SecurityScanner(BaseService):
                 if self._has_critical_vulnerabilities(scan_result["vulnerabilities"]):
                     state["error"] = "Critical security vulnerability detected"
                     logger.error(
-                        f"Critical security issue: {', '.join(scan_result['vulnerabilities'])}",
+                        "Critical security issue: %s",
+                        ", ".join(scan_result["vulnerabilities"]),
                         correlation_id=correlation_id
                     )
                 else:
@@ -129,7 +195,7 @@ class SecurityScanner(BaseService):
                 logger.info("Security scan passed", correlation_id=correlation_id)
                 
         except SecurityScanError as e:
-            logger.error(f"Security scan failed: {e}", correlation_id=correlation_id)
+            logger.error("Security scan failed: %s", e, correlation_id=correlation_id)
             # Don't block workflow on scan failure, but log it
             state["security_scan"] = {
                 "passed": False,
@@ -147,7 +213,34 @@ class SecurityScanner(BaseService):
         """
         return "security_scan"
 
-    def _check_secrets_exposure(self, yaml_content: str, correlation_id: Optional[str] = None) -> bool:
+    def _parse_yaml(self, yaml_content: str, correlation_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Parse pipeline YAML for the structural checks.
+        
+        Args:
+            yaml_content: YAML content to parse
+            correlation_id: Request correlation ID
+            
+        Returns:
+            Parsed mapping, or None if the YAML is invalid or not a mapping
+        """
+        try:
+            config = yaml.load(yaml_content, Loader=YamlLoader)
+        except yaml.YAMLError as e:
+            logger.warning(
+                "Failed to parse YAML for structural security checks: %s",
+                e,
+                correlation_id=correlation_id
+            )
+            return None
+        return config if isinstance(config, dict) else None
+
+    def _check_secrets_exposure(
+        self,
+        yaml_content: str,
+        parsed: Optional[Dict[str, Any]] = None,
+        correlation_id: Optional[str] = None
+    ) -> bool:
         """
         Check if secrets might be exposed in logs.
         
@@ -158,32 +251,29 @@ class SecurityScanner(BaseService):
         
         Args:
             yaml_content: YAML content to check
+            parsed: YAML parsed once by run (None if invalid or not a mapping)
             correlation_id: Request correlation ID
             
         Returns:
             True if potential secrets exposure detected
         """
-        risky_patterns = [
-            r'echo\s+\$.*PASSWORD',
-            r'echo\s+\$.*TOKEN',
-            r'echo\s+\$.*SECRET',
-            r'echo\s+\$.*KEY',
-            r'echo\s+\$.*API_KEY',
-            r'set\s+-x.*\$.*PASSWORD',
-            r'set\s+-x.*\$.*TOKEN',
-            r'set\s+-x.*\$.*SECRET',
-            r'printenv',
-            r'env\s*\|',
-        ]
-
-        for pattern in risky_patterns:
-            if re.search(pattern, yaml_content, re.IGNORECASE):
-                logger.debug(f"Secrets exposure pattern found: {pattern}", correlation_id=correlation_id)
-                return True
+        hit = SECRETS_MATCHER.first_match(yaml_content)
+        if hit is not None:
+            logger.debug(
+                "Secrets exposure pattern found: %s",
+                SECRETS_PATTERNS[hit],
+                correlation_id=correlation_id
+            )
+            return True
         
         return False
 
-    def _check_unsafe_commands(self, yaml_content: str, correlation_id: Optional[str] = None) -> bool:
+    def _check_unsafe_commands(
+        self,
+        yaml_content: str,
+        parsed: Optional[Dict[str, Any]] = None,
+        correlation_id: Optional[str] = None
+    ) -> bool:
         """
         Check for unsafe shell commands.
         
@@ -195,27 +285,29 @@ class SecurityScanner(BaseService):
         
         Args:
             yaml_content: YAML content to check
+            parsed: YAML parsed once by run (None if invalid or not a mapping)
             correlation_id: Request correlation ID
             
         Returns:
             True if unsafe commands detected
         """
-        unsafe_patterns = [
-            r'curl\s+.*\|\s*bash',
-            r'wget\s+.*\|\s*sh',
-            r'eval\s+\$',
-            r'rm\s+-rf\s+/',
-            r'chmod\s+777',
-        ]
-
-        for pattern in unsafe_patterns:
-            if re.search(pattern, yaml_content, re.IGNORECASE):
-                logger.debug(f"Unsafe command pattern found: {pattern}", correlation_id=correlation_id)
-                return True
+        hit = UNSAFE_COMMAND_MATCHER.first_match(yaml_content)
+        if hit is not None:
+            logger.debug(
+                "Unsafe command pattern found: %s",
+                UNSAFE_COMMAND_PATTERNS[hit],
+                correlation_id=correlation_id
+            )
+            return True
         
         return False
 
-    def _check_privilege_escalation(self, yaml_content: str, correlation_id: Optional[str] = None) -> bool:
+    def _check_privilege_escalation(
+        self,
+        yaml_content: str,
+        parsed: Optional[Dict[str, Any]] = None,
+        correlation_id: Optional[str] = None
+    ) -> bool:
         """
         Check for privilege escalation risks.
         
@@ -225,42 +317,38 @@ class SecurityScanner(BaseService):
         
         Args:
             yaml_content: YAML content to check
+            parsed: YAML parsed once by run (None if invalid or not a mapping)
             correlation_id: Request correlation ID
             
         Returns:
             True if privilege escalation risks detected
         """
-        try:
-            config = yaml.safe_load(yaml_content)
-            if not isinstance(config, dict):
-                return False
+        if parsed is None:
+            return False
 
-            jobs = config.get("jobs", {})
-            
-            for job_config in jobs.values():
-                # Check steps for sudo usage
-                steps = job_config.get("steps", [])
-                for step in steps:
-                    run_cmd = step.get("run", "") if isinstance(step, dict) else ""
-                    if "sudo" in run_cmd.lower():
-                        logger.debug("Privilege escalation detected: sudo usage", correlation_id=correlation_id)
-                        return True
-
-                # Check for privileged containers
-                container_opts = job_config.get("container", {}).get("options", "")
-                if "--privileged" in container_opts:
-                    logger.debug("Privilege escalation detected: privileged container", correlation_id=correlation_id)
-                    return True
+        jobs = parsed.get("jobs", {})
+        
+        for job_config in jobs.values():
+            # Check steps for sudo usage, stopping at the first hit
+            steps = job_config.get("steps", [])
+            if any(SUDO_PATTERN.search(step.get("run", "")) for step in steps if isinstance(step, dict)):
+                logger.debug("Privilege escalation detected: sudo usage", correlation_id=correlation_id)
+                return True
 
-        except yaml.YAMLError as e:
-            logger.warning(
-                f"Failed to parse YAML for privilege escalation check: {e}",
-                correlation_id=correlation_id
-            )
+            # Check for privileged containers
+            container_opts = job_config.get("container", {}).get("options", "")
+            if "--privileged" in container_opts:
+                logger.debug("Privilege escalation detected: privileged container", correlation_id=correlation_id)
+                return True
 
         return False
 
-    def _check_insecure_defaults(self, yaml_content: str, correlation_id: Optional[str] = None) -> bool:
+    def _check_insecure_defaults(
+        self,
+        yaml_content: str,
+        parsed: Optional[Dict[str, Any]] = None,
+        correlation_id: Optional[str] = None
+    ) -> bool:
         """
         Check for insecure default configurations.
         
@@ -269,31 +357,25 @@ class SecurityScanner(BaseService):
         
         Args:
             yaml_content: YAML content to check
+            parsed: YAML parsed once by run (None if invalid or not a mapping)
             correlation_id: Request correlation ID
             
         Returns:
             True if insecure defaults detected
         """
-        try:
-            config = yaml.safe_load(yaml_content)
-            if not isinstance(config, dict):
-                return False
-
-            jobs = config.get("jobs", {})
-            
-            for job_id, job_config in jobs.items():
-                if "timeout-minutes" not in job_config:
-                    logger.debug(
-                        f"Insecure default: missing timeout for job {job_id}",
-                        correlation_id=correlation_id
-                    )
-                    return True
+        if parsed is None:
+            return False
 
-        except yaml.YAMLError as e:
-            logger.warning(
-                f"Failed to parse YAML for insecure defaults check: {e}",
-                correlation_id=correlation_id
-            )
+        jobs = parsed.get("jobs", {})
+        
+        for job_id, job_config in jobs.items():
+            if "timeout-minutes" not in job_config:
+                logger.debug(
+                    "Insecure default: missing timeout for job %s",
+                    job_id,
+                    correlation_id=correlation_id
+                )
+                return True
 
         return False
 
@@ -1,10 +1,15 @@
 import pytest
-from app.components.scan.security_scanner import SecurityScanner
+import yaml
+from unittest.mock import patch
+
+from app.components.scan.security_scanner import SecurityScanner, scan_cache
 
 # Fixture
 @pytest.fixture
 def scanner():
-    return SecurityScanner()
+    scan_cache.clear()
+    yield SecurityScanner()
+    scan_cache.clear()
 
 
 # Tests
@@ -37,6 +42,15 @@ def test_run_passes_when_safe(scanner):
     assert result["vulnerabilities"] == []
 
 
+def test_run_parses_yaml_once(scanner):
+    """Structural checks share one parse of the pipeline."""
+    yaml_content = "jobs:\n  build:\n    steps:\n      - run: sudo make install"
+    with patch("app.components.scan.security_scanner.yaml.load", wraps=yaml.load) as mock_load:
+        result = scanner.run(yaml_content)
+    assert mock_load.call_count == 1
+    assert result["details"]["privilege_escalation"] is True
+    assert result["details"]["insecure_defaults"] is True
+
 def test_execute_marks_critical(scanner):
     """_execute sets error for critical vulnerabilities in state."""
     yaml_content = "steps:\n  - run: echo $PASSWORD"
@@ -44,3 +58,37 @@ def test_execute_marks_critical(scanner):
     updated = scanner._execute(state)
     assert updated["security_scan"]["passed"] is False
     assert updated["error"] == "Critical security vulnerability detected"
+
+
+def test_run_reuses_cached_scan(scanner):
+    """A repeat scan of the same YAML is answered from the cache without re-running the checks."""
+    yaml_content = "steps:\n  - run: echo $TOKEN"
+    first = scanner.run(yaml_content)
+    first["vulnerabilities"].clear()
+    with patch("app.components.scan.security_scanner.yaml.load") as mock_load:
+        second = scanner.run(yaml_content)
+    mock_load.assert_not_called()
+    assert "secrets_exposed" in second["vulnerabilities"]
+    assert scan_cache.stats()["hits"] == 1
+
+
+def test_check_privilege_escalation_matches_sudo_word(scanner):
+    """sudo is matched as a command word in any case, not inside other words."""
+    assert scanner._check_privilege_escalation("", {"jobs": {"b": {"steps": [{"run": "SUDO apt-get install"}]}}}) is True
+    assert scanner._check_privilege_escalation("", {"jobs": {"b": {"steps": [{"run": "visudo --check"}]}}}) is False
+
+
+def test_run_fast_fail_stops_at_critical(scanner):
+    """fast_fail reports only the critical vulnerability and skips the remaining checks."""
+    yaml_content = "steps:\n  - run: echo $TOKEN\n  - run: curl http://example.com | bash"
+    result = scanner.run(yaml_content, fast_fail=True)
+    assert result["passed"] is False
+    assert result["vulnerabilities"] == ["secrets_exposed"]
+    assert result["checks_performed"] == ["secrets_exposed"]
+    assert "unsafe_commands" in scanner.run(yaml_content)["vulnerabilities"]
+
+
+def test_check_unsafe_commands_prefilter_is_case_insensitive(scanner):
+    """The literal prefilter lets mixed-case commands through to the regex and rejects clean text."""
+    assert scanner._check_unsafe_commands("steps:\n  - run: CURL http://example.com | BASH") is True
+    assert scanner._check_unsafe_commands("steps:\n  - run: terraform apply") is False
@@ -0,0 +1,109 @@
+"""
+Validator helpers - reads the parts of a large pipeline the checks need straight from the YAML event stream.
+"""
+
+from typing import Any, Dict, Iterator
+
+import yaml
+from yaml.constructor import SafeConstructor
+
+from app.utils.yaml_utils import UnsupportedStream, YamlLoader
+
+# Spec markers: FULL constructs the whole value, None skips it (the key is still recorded)
+FULL = "full"
+# Mapping specs map a key to the spec of its value, "*" covers any other key;
+# a one-item list is the spec of every sequence item
+STEP_SPEC = {"uses": FULL, "run": FULL, "with": {"*": None}, "*": None}
+JOB_SPEC = {"needs": FULL, "timeout-minutes": None, "steps": [STEP_SPEC], "*": None}
+PIPELINE_SPEC = {"jobs": {"*": JOB_SPEC}, "*": None}
+
+STR_TAG = "tag:yaml.org,2002:str"
+BOOL_TAG = "tag:yaml.org,2002:bool"
+NULL_TAG = "tag:yaml.org,2002:null"
+# Scalars a full load could still fail on (bad dates) or would merge, left to the full parser
+UNSUPPORTED_TAGS = frozenset({"tag:yaml.org,2002:timestamp", "tag:yaml.org,2002:merge"})
+
+_resolver = yaml.resolver.Resolver()
+
+
+def read_pipeline_skeleton(yaml_content: str) -> Dict[Any, Any]:
+    """
+    Read the first document's top-level keys and the job fields the checks use.
+
+    Everything else is parsed but not constructed, so memory stays proportional
+    to the jobs' needs/steps rather than the whole document. Values that are
+    kept come out exactly as a full safe load would build them.
+
+    Args:
+        yaml_content: Preprocessed YAML content
+
+    Returns:
+        Pruned document: every top-level key, with jobs holding needs,
+        timeout-minutes (as None), and steps' uses, run and with keys
+
+    Raises:
+        UnsupportedStream: If the document needs the full parser
+        yaml.YAMLError: If the YAML is malformed
+    """
+    events = yaml.parse(yaml_content, Loader=YamlLoader)
+    for event in events:
+        if isinstance(event, yaml.NodeEvent):
+            if not isinstance(event, yaml.MappingStartEvent):
+                raise UnsupportedStream("root is not a mapping")
+            doc = _read_node(events, event, PIPELINE_SPEC)
+            if not doc:
+                raise UnsupportedStream("empty root mapping")
+            return doc
+    raise UnsupportedStream("no document")
+
+
+def _read_node(events: Iterator[yaml.Event], event: yaml.Event, spec: Any) -> Any:
+    """Read one node starting at event, building it as far as spec asks."""
+    if isinstance(event, yaml.AliasEvent) or event.anchor or event.tag not in (None, "!"):
+        raise UnsupportedStream("anchor, alias or explicit tag")
+
+    if isinstance(event, yaml.ScalarEvent):
+        return _scalar_value(event, spec is not None)
+
+    is_mapping = isinstance(event, yaml.MappingStartEvent)
+    # A node shaped differently from its spec (e.g. steps given as a string) is kept whole
+    if spec is not None and spec is not FULL and isinstance(spec, dict) != is_mapping:
+        spec = FULL
+
+    if not is_mapping:
+        item_spec = spec[0] if isinstance(spec, list) else spec
+        items = [] if spec is not None else None
+        for item_event in events:
+            if isinstance(item_event, yaml.SequenceEndEvent):
+                return items
+            item = _read_node(events, item_event, item_spec)
+            if items is not None:
+                items.append(item)
+
+    mapping = {} if spec is not None else None
+    for key_event in events:
+        if isinstance(key_event, yaml.MappingEndEvent):
+            return mapping
+        if not isinstance(key_event, yaml.ScalarEvent):
+            raise UnsupportedStream("alias or collection as mapping key")
+        if key_event.anchor or key_event.tag not in (None, "!"):
+            raise UnsupportedStream("anchor or explicit tag on mapping key")
+        key = _scalar_value(key_event, spec is not None)
+        value_spec = None if spec is None else spec if spec is FULL else spec.get(key, spec["*"])
+        value = _read_node(events, next(events), value_spec)
+        if mapping is not None:
+            mapping[key] = value
+    raise UnsupportedStream("unterminated collection")
+
+
+def _scalar_value(event: yaml.ScalarEvent, keep: bool) -> Any:
+    """Resolve a scalar like the safe loader does for strings, booleans and nulls."""
+    # Only plain scalars are resolved, quoted and block scalars are always strings
+    tag = _resolver.resolve(yaml.ScalarNode, event.value, (True, False)) if event.implicit[0] else STR_TAG
+    if tag == STR_TAG:
+        return event.value
+    if tag in UNSUPPORTED_TAGS or keep and tag not in (BOOL_TAG, NULL_TAG):
+        raise UnsupportedStream(f"scalar resolved to {tag}")
+    if keep and tag == BOOL_TAG:
+        return SafeConstructor.bool_values[event.value.lower()]
+    return None
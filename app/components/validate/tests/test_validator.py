@@ -1,5 +1,7 @@
 import pytest
-from app.components.validate.validator import Validator
+from unittest.mock import patch
+
+from app.components.validate.validator import Validator, result_cache
 
 
 # Fixture
@@ -31,6 +33,37 @@ jobs:
     assert "circular dependency" in result["reason"].lower()
 
 
+def test_run_accepts_empty_jobs_block(validator):
+    """An empty jobs block has nothing to scan and should not error."""
+    result = validator.run("on: push\njobs:\n", mode="output")
+    assert result["valid"] is True
+    assert "issues" not in result
+
+def test_run_detects_multi_job_cycle(validator):
+    """Detects cycles through several jobs, reported from the smallest job id."""
+    yaml_content = """on: push
+jobs:
+  lint:
+    steps:
+      - run: echo lint
+  test:
+    needs: [lint, deploy]
+    steps:
+      - run: echo test
+  deploy:
+    needs: build
+    steps:
+      - run: echo deploy
+  build:
+    needs: test
+    steps:
+      - run: echo build
+"""
+    result = validator.run(yaml_content, mode="input")
+    assert result["valid"] is False
+    assert result["reason"] == "Circular dependency: build -> test -> deploy -> build"
+
+
 def test_run_detects_best_practices_issues(validator):
     """Reports best practices issues in output mode."""
     yaml_content = """on: push
@@ -66,3 +99,109 @@ def test_execute_stores_result_and_error_on_failure(validator):
     assert "validation_result" in updated
     assert updated["validation_result"]["valid"] is False
     assert "error" in updated
+
+
+def test_best_practices_detects_caching_from_step_fields(validator):
+    """Caching is detected from uses/with/run fields, not from any mention in the step."""
+    cached = """on: push
+jobs:
+  build:
+    timeout-minutes: 10
+    steps:
+      - uses: actions/setup-node@v4
+        with:
+          cache: npm
+"""
+    uncached = """on: push
+jobs:
+  build:
+    timeout-minutes: 10
+    steps:
+      - name: Skip cache warmup
+        uses: actions/setup-node@v4
+"""
+    assert "issues" not in validator.run(cached, mode="output")
+    assert validator.run(uncached, mode="output")["issues"] == ["No caching detected"]
+
+    for action, cache_input in [
+        ("ruby/setup-ruby@v1", "bundler-cache"),
+        ("astral-sh/setup-uv@v5", "enable-cache"),
+        ("mamba-org/setup-micromamba@v1", "cache-environment"),
+    ]:
+        step_input = f"""on: push
+jobs:
+  build:
+    timeout-minutes: 10
+    steps:
+      - uses: {action}
+        with:
+          {cache_input}: true
+"""
+        assert "issues" not in validator.run(step_input, mode="output"), cache_input
+
+    for action in [
+        "hendrikmuhs/ccache-action@v1.2",
+        "mozilla-actions/sccache-action@v0.0.4",
+        "DeterminateSystems/magic-nix-cache-action@v2",
+        "cachix/cachix-action@v14",
+    ]:
+        step_uses = f"""on: push
+jobs:
+  build:
+    timeout-minutes: 10
+    steps:
+      - uses: {action}
+"""
+        assert "issues" not in validator.run(step_uses, mode="output"), action
+
+
+def test_parse_reused_across_validators():
+    """Validating the same YAML again should reuse the cached parse."""
+    yaml_content = """on: push
+jobs:
+  reparse:
+    steps:
+      - run: echo cached
+"""
+    Validator().run(yaml_content, mode="input")
+    with patch("app.components.validate.validator.yaml.load_all") as mock_load:
+        result = Validator().run(yaml_content, mode="output")
+
+    mock_load.assert_not_called()
+    assert result["valid"] is True
+
+
+def test_result_reused_for_same_yaml_and_mode(validator):
+    """Re-validating identical YAML in the same mode should skip the checks and return a fresh copy."""
+    yaml_content = """on: push
+jobs:
+  memo:
+    steps:
+      - run: echo memo
+"""
+    first = validator.run(yaml_content, mode="output")
+    first["issues"].append("mutated")
+    hits = result_cache.stats()["hits"]
+    with patch.object(Validator, "_validate") as mock_validate:
+        second = validator.run(yaml_content, mode="output")
+
+    mock_validate.assert_not_called()
+    assert "mutated" not in second["issues"]
+    assert result_cache.stats()["hits"] == hits + 1
+
+
+def test_large_yaml_read_from_event_stream(validator):
+    """Large pipelines are checked from the streamed skeleton, matching the full parse."""
+    jobs = "".join(
+        f"  job{i}:\n    needs: job{i - 1}\n    env:\n      NOTE: {'x' * 400}\n    steps:\n      - run: make\n"
+        for i in range(1, 300)
+    )
+    yaml_content = "on: push\njobs:\n  job0:\n    timeout-minutes: 5\n    steps:\n      - uses: actions/cache@v4\n" + jobs
+
+    with patch.object(Validator, "_load_first_document") as mock_load:
+        result = validator.run(yaml_content, mode="output")
+
+    mock_load.assert_not_called()
+    assert result["valid"] is True
+    assert "No caching detected" not in result["issues"]
+    assert len(result["issues"]) == 299
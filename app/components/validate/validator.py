@@ -4,14 +4,37 @@ Supports two modes: input (pre-optimisation) and output (post-optimisation).
 """
 
 import yaml
-from typing import Dict, Any, Optional, List
+from collections import deque
+from typing import Dict, Any, Optional, List, Tuple
 
 from app.components.base_service import BaseService
 from app.utils.logger import get_logger
 from app.exceptions import ValidationError
+from app.utils.yaml_utils import UnsupportedStream, YamlLoader
+from app.utils.cache_utils import ResultCache, content_key
+from app.components.validate.helper import read_pipeline_skeleton
 
 logger = get_logger(__name__, "Validator")
 
+# Actions that cache on their own without "cache" in their name, matched as `uses:` prefixes (lowercase)
+CACHE_ACTIONS = (
+    "gradle/gradle-build-action",
+    "gradle/actions/setup-gradle",
+    "cachix/cachix-action",
+)
+
+# Pipelines at least this long are read from the YAML event stream, building only the fields
+# the checks look at instead of the whole document
+STREAM_PARSE_MIN_CHARS = 100_000
+
+# Parsed documents of recently validated YAML, shared by the per-request Validators so
+# retried runs on the same text skip the parse; the checks only read them, so no copies
+PARSE_CACHE_SIZE = 32
+parse_cache = ResultCache(max_entries=PARSE_CACHE_SIZE, copy_values=False)
+# Validation results are pure in (mode, YAML text), so re-runs of the same text skip all checks
+RESULT_CACHE_SIZE = 128
+result_cache = ResultCache(max_entries=RESULT_CACHE_SIZE)
+
 
 class Validator(BaseService):
     """
@@ -67,7 +90,24 @@ class Validator(BaseService):
         if mode not in ["input", "output"]:
             raise ValidationError(f"Invalid mode: {mode}. Must be 'input' or 'output'")
 
-        logger.debug(f"Starting YAML validation (mode={mode})", correlation_id=correlation_id)
+        key = content_key(mode, pipeline_yaml)
+        cached = result_cache.get(key)
+        if cached is not None:
+            logger.debug("Using cached validation result (mode=%s)", mode, correlation_id=correlation_id)
+            return cached
+        
+        result = self._validate(pipeline_yaml, mode, correlation_id)
+        result_cache.put(key, result)
+        return result
+
+    def _validate(
+        self,
+        pipeline_yaml: str,
+        mode: str,
+        correlation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run the syntax, key, dependency and best practice checks on validated inputs."""
+        logger.debug("Starting YAML validation (mode=%s)", mode, correlation_id=correlation_id)
 
         # Preprocess YAML
         preprocessed_yaml = self._preprocess_yaml(pipeline_yaml)
@@ -94,8 +134,9 @@ class Validator(BaseService):
                 "mode": mode
             }
 
-        # Check 2: Job dependencies (both modes)
-        dep_check = self._check_dependencies(parsed_yaml, correlation_id)
+        # Checks 2 and 3: Job dependencies (both modes) and best practices (output mode only),
+        # collected in one pass over the jobs
+        dep_check, issues = self._scan_jobs(parsed_yaml, mode == "output", correlation_id)
         if not dep_check["valid"]:
             return {
                 "valid": False,
@@ -103,21 +144,18 @@ class Validator(BaseService):
                 "mode": mode
             }
 
-        # Check 3: Best practices (output mode only)
-        issues = []
-        if mode == "output":
-            bp_check = self._check_best_practices(parsed_yaml, correlation_id)
-            issues = bp_check.get("issues", [])
-            
-            if issues:
-                logger.info(
-                    f"Best practices issues found: {', '.join(issues)}",
-                    correlation_id=correlation_id
-                )
+        if issues:
+            logger.info(
+                "Best practices issues found: %s",
+                ", ".join(issues),
+                correlation_id=correlation_id
+            )
 
         # Success
         logger.info(
-            f"Validation complete (mode={mode}): valid=True, issues={len(issues)}",
+            "Validation complete (mode=%s): valid=True, issues=%d",
+            mode,
+            len(issues),
             correlation_id=correlation_id
         )
         
@@ -186,7 +224,7 @@ class Validator(BaseService):
                 correlation_id=correlation_id
             )
         else:
-            logger.debug(f"Validation passed ({mode} mode)", correlation_id=correlation_id)
+            logger.debug("Validation passed (%s mode)", mode, correlation_id=correlation_id)
 
         return state
 
@@ -212,7 +250,7 @@ class Validator(BaseService):
         try:
             return yaml_content.encode("utf-8").decode("utf-8-sig").strip()
         except Exception as e:
-            logger.debug(f"Encoding normalization failed, using as-is: {e}")
+            logger.debug("Encoding normalization failed, using as-is: %s", e)
             return yaml_content.strip()
 
     def _parse_yaml(
@@ -230,11 +268,40 @@ class Validator(BaseService):
         Returns:
             Parsed YAML dictionary, or None if parsing fails
         """
+        key = content_key(yaml_content)
+        doc = parse_cache.get(key)
+        if doc is not None:
+            logger.debug("Using cached YAML parse", correlation_id=correlation_id)
+            return doc
+        
+        doc = None
+        if len(yaml_content) >= STREAM_PARSE_MIN_CHARS:
+            try:
+                doc = read_pipeline_skeleton(yaml_content)
+            except (UnsupportedStream, RecursionError) as e:
+                logger.debug("Streaming parse not possible (%s), loading fully", e, correlation_id=correlation_id)
+            except yaml.YAMLError as e:
+                logger.error(f"YAML parsing error: {e}", correlation_id=correlation_id)
+                return None
+        
+        if doc is None:
+            doc = self._load_first_document(yaml_content, correlation_id)
+        if doc is not None:
+            parse_cache.put(key, doc)
+        return doc
+
+    def _load_first_document(
+        self,
+        yaml_content: str,
+        correlation_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Parse YAML and return its first non-empty mapping document, or None."""
         try:
-            for doc in yaml.safe_load_all(yaml_content):
+            for doc in yaml.load_all(yaml_content, Loader=YamlLoader):
                 if isinstance(doc, dict) and doc:
                     logger.debug(
-                        f"Successfully parsed YAML document with {len(doc)} top-level keys",
+                        "Successfully parsed YAML document with %d top-level keys",
+                        len(doc),
                         correlation_id=correlation_id
                     )
                     return doc
@@ -267,32 +334,46 @@ class Validator(BaseService):
                 normalised.append(str(key))
         return normalised
 
-    def _check_dependencies(
-        self, 
+    def _scan_jobs(
+        self,
         parsed_yaml: Dict[str, Any],
+        best_practices: bool = False,
         correlation_id: Optional[str] = None
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Dict[str, Any], List[str]]:
         """
-        Validate job dependencies.
+        Validate job dependencies and collect best practice issues in one pass over the jobs.
         
         Checks for:
-        - Circular dependencies (job depending on itself)
+        - Circular dependencies (job depending on itself or a cycle through several jobs)
         - Missing dependencies (job depending on non-existent job)
+        - Caching usage and job timeouts (non-blocking, only if best_practices is set)
         
         Args:
             parsed_yaml: Parsed YAML dictionary
+            best_practices: Also collect best practice issues (output mode)
             correlation_id: Request correlation ID
             
         Returns:
-            Validation result: {"valid": True/False, "reason": "..."}
+            Tuple of dependency result {"valid": True/False, "reason": "..."} and
+            best practice issues (empty when dependencies are invalid)
         """
         jobs = parsed_yaml.get("jobs", {})
+        # Nothing to walk for an empty (or null) jobs block
+        if not isinstance(jobs, dict) or not jobs:
+            logger.debug("No jobs to validate", correlation_id=correlation_id)
+            return {"valid": True, "reason": "No jobs to validate"}, []
+        
+        graph: Dict[Any, List[Any]] = {}
+        missing_timeouts: List[str] = []
+        # Caching only needs one hit, so stop looking at steps once found
+        has_caching = not best_practices
         
         for job_id, job_cfg in jobs.items():
             # Get job dependencies
             needs = job_cfg.get("needs", [])
             if isinstance(needs, str):
                 needs = [needs]
+            graph[job_id] = needs
             
             # Check each dependency
             for dep in needs:
@@ -305,7 +386,7 @@ class Validator(BaseService):
                     return {
                         "valid": False,
                         "reason": f"Circular dependency: Job {job_id} depends on itself"
-                    }
+                    }, []
                 
                 # Check for missing dependency
                 if dep not in jobs:
@@ -316,55 +397,130 @@ class Validator(BaseService):
                     return {
                         "valid": False,
                         "reason": f"Missing dependency: Job {job_id} depends on non-existent job {dep}"
-                    }
+                    }, []
+            
+            if best_practices:
+                if not has_caching:
+                    has_caching = self._job_uses_caching(job_cfg)
+                if "timeout-minutes" not in job_cfg:
+                    missing_timeouts.append(f"Job {job_id} missing timeout")
         
-        logger.debug("Job dependencies check passed", correlation_id=correlation_id)
-        return {"valid": True, "reason": "Dependencies valid"}
+        # Self-dependencies are caught above, longer cycles need the whole graph
+        cycle = self._find_cycle(graph)
+        if cycle:
+            cycle_str = " -> ".join(str(job_id) for job_id in cycle)
+            logger.error(f"Circular dependency: {cycle_str}", correlation_id=correlation_id)
+            return {"valid": False, "reason": f"Circular dependency: {cycle_str}"}, []
+        
+        issues = missing_timeouts if has_caching else ["No caching detected", *missing_timeouts]
+        logger.debug(
+            "Job scan passed: dependencies valid, %d best practice issues",
+            len(issues),
+            correlation_id=correlation_id
+        )
+        return {"valid": True, "reason": "Dependencies valid"}, issues
 
-    def _check_best_practices(
-        self,
-        parsed_yaml: Dict[str, Any],
-        correlation_id: Optional[str] = None
-    ) -> Dict[str, Any]:
+    @staticmethod
+    def _find_cycle(graph: Dict[Any, List[Any]]) -> Optional[List[Any]]:
         """
-        Check CI/CD best practices (non-blocking).
-        
-        Checks for:
-        - Caching usage (improves performance)
-        - Job timeouts (prevents hanging jobs)
+        Find a dependency cycle with an iterative Tarjan SCC pass, in O(jobs + needs).
         
         Args:
-            parsed_yaml: Parsed YAML dictionary
-            correlation_id: Request correlation ID
+            graph: Job id to the job ids it needs (all present in graph)
             
         Returns:
-            Dictionary with issues list
+            Cycle as job ids starting and ending at its smallest job id, or None
         """
-        issues: List[str] = []
-        jobs = parsed_yaml.get("jobs", {})
-        
-        # Check for caching
-        has_caching = False
-        for job_cfg in jobs.values():
-            steps = job_cfg.get("steps", [])
-            for step in steps:
-                if isinstance(step, dict) and "cache" in str(step).lower():
-                    has_caching = True
-                    break
-            if has_caching:
-                break
+        index: Dict[Any, int] = {}
+        lowlink: Dict[Any, int] = {}
+        stack: List[Any] = []
+        on_stack = set()
         
-        if not has_caching:
-            issues.append("No caching detected")
+        for root in graph:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            # Explicit work stack instead of recursion, deep needs chains can't hit the recursion limit
+            work = [(root, iter(graph[root]))]
+            while work:
+                node, deps = work[-1]
+                for dep in deps:
+                    if dep not in index:
+                        index[dep] = lowlink[dep] = len(index)
+                        stack.append(dep)
+                        on_stack.add(dep)
+                        work.append((dep, iter(graph[dep])))
+                        break
+                    if dep in on_stack:
+                        lowlink[node] = min(lowlink[node], index[dep])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] != index[node]:
+                        continue
+                    component = set()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.add(member)
+                        if member == node:
+                            break
+                    if len(component) > 1:
+                        return Validator._cycle_in_component(graph, component)
+        return None
+
+    @staticmethod
+    def _cycle_in_component(graph: Dict[Any, List[Any]], component: set) -> List[Any]:
+        """Return the shortest cycle through the smallest job id of a strongly connected component."""
+        start = min(component, key=str)
+        parents = {start: None}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for dep in graph[node]:
+                if dep == start:
+                    path = [node]
+                    while path[-1] != start:
+                        path.append(parents[path[-1]])
+                    return path[::-1] + [start]
+                if dep in component and dep not in parents:
+                    parents[dep] = node
+                    queue.append(dep)
+        return sorted(component, key=str)
+
+    @classmethod
+    def _job_uses_caching(cls, job_cfg: Dict[str, Any]) -> bool:
+        """Check whether any step of a job caches, stopping at the first that does."""
+        return any(
+            cls._step_uses_caching(step)
+            for step in job_cfg.get("steps", [])
+            if isinstance(step, dict)
+        )
+
+    @staticmethod
+    def _step_uses_caching(step: Dict[str, Any]) -> bool:
+        """
+        Check a step for caching without serialising it.
         
-        # Check for job timeouts
-        for job_id, job_cfg in jobs.items():
-            if "timeout-minutes" not in job_cfg:
-                issues.append(f"Job {job_id} missing timeout")
+        Looks at the fields that enable caching: a caching action in `uses`,
+        a cache input under `with`, or a cache mention in a `run` command.
+        """
+        uses = step.get("uses")
+        if isinstance(uses, str):
+            uses = uses.lower()
+            # actions/cache, ccache-action, sccache-action, magic-nix-cache-action, ...
+            if "cache" in uses or uses.startswith(CACHE_ACTIONS):
+                return True
         
-        logger.debug(
-            f"Best practices check: {len(issues)} issues found",
-            correlation_id=correlation_id
-        )
+        inputs = step.get("with")
+        # Any cache input switches it on (setup-node cache, buildx cache-from, setup-ruby bundler-cache, ...)
+        if isinstance(inputs, dict) and any("cache" in str(key).lower() for key in inputs):
+            return True
         
-        return {"issues": issues}
\ No newline at end of file
+        run = step.get("run")
+        # Caching done in shell steps (ccache, --cache-dir, ...)
+        return isinstance(run, str) and "cache" in run.lower()
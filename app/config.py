@@ -48,6 +48,27 @@ class Config:
     CRITIC_REGRESSION_PENALTY: Optional[str] = os.getenv("CRITIC_REGRESSION_PENALTY", "0.05")
     CRITIC_UNRESOLVED_PENALTY: Optional[str] = os.getenv("CRITIC_UNRESOLVED_PENALTY", "0.02")
 
+    # Risk Assessor: heuristic scores below this skip the LLM (0 always calls it)
+    RISK_SKIP_LLM_BELOW: Optional[str] = os.getenv("RISK_SKIP_LLM_BELOW", "2.0")
+
+    # Optimiser Cache
+    OPTIMISER_CACHE_SIZE: Optional[str] = os.getenv("OPTIMISER_CACHE_SIZE", "256")
+    OPTIMISER_SIMILARITY_THRESHOLD: Optional[str] = os.getenv("OPTIMISER_SIMILARITY_THRESHOLD", "0.95")
+    OPTIMISER_CACHE_TTL: Optional[str] = os.getenv("OPTIMISER_CACHE_TTL", "86400")
+    OPTIMISER_TWO_STAGE: Optional[str] = os.getenv("OPTIMISER_TWO_STAGE", "true")
+    OPTIMISER_SPECULATIVE_EXECUTION: Optional[str] = os.getenv("OPTIMISER_SPECULATIVE_EXECUTION", "false")
+    OPTIMISER_MAX_CONCURRENCY: Optional[str] = os.getenv("OPTIMISER_MAX_CONCURRENCY", "8")
+    OPTIMISER_MAX_INPUT_TOKENS: Optional[str] = os.getenv("OPTIMISER_MAX_INPUT_TOKENS", "150000")
+
+    # Resolver GitHub client
+    GITHUB_MAX_RETRIES: Optional[str] = os.getenv("GITHUB_MAX_RETRIES", "5")
+    GITHUB_RETRY_BACKOFF: Optional[str] = os.getenv("GITHUB_RETRY_BACKOFF", "1.0")
+    GITHUB_MIN_RATE_BUDGET: Optional[str] = os.getenv("GITHUB_MIN_RATE_BUDGET", "10")
+    GITHUB_POOL_SIZE: Optional[str] = os.getenv("GITHUB_POOL_SIZE", "20")
+    GITHUB_CACHE_SIZE: Optional[str] = os.getenv("GITHUB_CACHE_SIZE", "128")
+    GITHUB_CACHE_TTL: Optional[str] = os.getenv("GITHUB_CACHE_TTL", "60")
+    GITHUB_LOCK_TIMEOUT: Optional[str] = os.getenv("GITHUB_LOCK_TIMEOUT", "300")
+
     # Database Configuration
     DB_HOST: Optional[str] = os.getenv("DB_HOST")
     DB_PORT: Optional[str] = os.getenv("DB_PORT")
@@ -149,6 +170,24 @@ class Config:
             cls.CRITIC_REGRESSION_PENALTY = float(cls.CRITIC_REGRESSION_PENALTY)
             cls.CRITIC_UNRESOLVED_PENALTY = float(cls.CRITIC_UNRESOLVED_PENALTY)
 
+            cls.RISK_SKIP_LLM_BELOW = float(cls.RISK_SKIP_LLM_BELOW)
+
+            cls.OPTIMISER_CACHE_SIZE = int(cls.OPTIMISER_CACHE_SIZE)
+            cls.OPTIMISER_SIMILARITY_THRESHOLD = float(cls.OPTIMISER_SIMILARITY_THRESHOLD)
+            cls.OPTIMISER_CACHE_TTL = float(cls.OPTIMISER_CACHE_TTL)
+            cls.OPTIMISER_TWO_STAGE = cls.OPTIMISER_TWO_STAGE.lower() == "true"
+            cls.OPTIMISER_SPECULATIVE_EXECUTION = cls.OPTIMISER_SPECULATIVE_EXECUTION.lower() == "true"
+            cls.OPTIMISER_MAX_CONCURRENCY = int(cls.OPTIMISER_MAX_CONCURRENCY)
+            cls.OPTIMISER_MAX_INPUT_TOKENS = int(cls.OPTIMISER_MAX_INPUT_TOKENS)
+
+            cls.GITHUB_MAX_RETRIES = int(cls.GITHUB_MAX_RETRIES)
+            cls.GITHUB_RETRY_BACKOFF = float(cls.GITHUB_RETRY_BACKOFF)
+            cls.GITHUB_MIN_RATE_BUDGET = int(cls.GITHUB_MIN_RATE_BUDGET)
+            cls.GITHUB_POOL_SIZE = int(cls.GITHUB_POOL_SIZE)
+            cls.GITHUB_CACHE_SIZE = int(cls.GITHUB_CACHE_SIZE)
+            cls.GITHUB_CACHE_TTL = float(cls.GITHUB_CACHE_TTL)
+            cls.GITHUB_LOCK_TIMEOUT = float(cls.GITHUB_LOCK_TIMEOUT)
+
             cls.DB_PORT = int(cls.DB_PORT)
             cls.DB_POOL_SIZE = int(cls.DB_POOL_SIZE)
             cls.DB_MAX_OVERFLOW = int(cls.DB_MAX_OVERFLOW)
@@ -198,7 +237,14 @@ class Config:
         return {
             "model": cls.OPTIMISER_MODEL,
             "temperature": cls.OPTIMISER_MODEL_TEMPERATURE,
-            "max_tokens": cls.OPTIMISER_MODEL_TOKEN
+            "max_tokens": cls.OPTIMISER_MODEL_TOKEN,
+            "cache_size": cls.OPTIMISER_CACHE_SIZE,
+            "similarity_threshold": cls.OPTIMISER_SIMILARITY_THRESHOLD,
+            "cache_ttl": cls.OPTIMISER_CACHE_TTL,
+            "two_stage": cls.OPTIMISER_TWO_STAGE,
+            "speculative_execution": cls.OPTIMISER_SPECULATIVE_EXECUTION,
+            "max_concurrency": cls.OPTIMISER_MAX_CONCURRENCY,
+            "max_input_tokens": cls.OPTIMISER_MAX_INPUT_TOKENS
         }
     
     @classmethod
@@ -219,7 +265,8 @@ class Config:
         return {
             "model": cls.RISK_MODEL,
             "temperature": cls.RISK_MODEL_TEMPERATURE,
-            "max_tokens": cls.RISK_MODEL_TOKEN
+            "max_tokens": cls.RISK_MODEL_TOKEN,
+            "skip_llm_below": cls.RISK_SKIP_LLM_BELOW
         }
 
 
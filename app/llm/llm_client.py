@@ -3,16 +3,50 @@ LLM client for pipeline optimiser.
 """
 import json
 import re
-from typing import Dict, Any, Optional
+import time
+from functools import lru_cache
+from typing import Dict, Any, Iterator, Optional, List, Tuple
 
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from app.config import config
 from app.utils.logger import get_logger
+from app.utils import json_utils
 
 logger = get_logger(__name__, "LLMClient")
 
+JSON_FENCE_PATTERN = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+JSON_DECODER = json.JSONDecoder()
+
+
+@lru_cache(maxsize=32)
+def _cached_system_blocks(system_prompt: str) -> List[Dict[str, Any]]:
+    """Build the cache_control system block once per static system prompt."""
+    return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def extract_tagged_block(response: str, tag: str) -> Optional[str]:
+    """
+    Return the stripped text between the first <tag> and the following </tag>.
+    
+    Args:
+        response: Raw LLM response text
+        tag: Tag name without angle brackets
+        
+    Returns:
+        Block content, or None if the tag pair is missing
+    """
+    open_tag = f"<{tag}>"
+    start = response.find(open_tag)
+    if start == -1:
+        return None
+    start += len(open_tag)
+    end = response.find(f"</{tag}>", start)
+    if end == -1:
+        return None
+    return response[start:end].strip()
+
 
 class LLMClient:
     """ LLM client with standard patterns with common error handling and retries."""
@@ -27,6 +61,7 @@ class LLMClient:
         """
         self.model = model
         self.temperature = temperature
+        self._batch_client = None
 
         if not getattr(config, "ANTHROPIC_API_KEY", None):
             raise ValueError("ANTHROPIC_API_KEY not configured")
@@ -56,7 +91,9 @@ class LLMClient:
         self, 
         system_prompt: str, 
         user_prompt: str, 
-        max_tokens: int = 1024
+        max_tokens: int = 1024,
+        cache_system_prompt: bool = False,
+        user_prefix: Optional[str] = None
     ) -> str:
         """
         Send a chat completion request (returns raw text).
@@ -65,6 +102,9 @@ class LLMClient:
             system_prompt: System message content
             user_prompt: User message content
             max_tokens: Maximum tokens to generate
+            cache_system_prompt: Mark the system prompt for Anthropic prompt caching
+            user_prefix: Optional leading user content block, marked for prompt caching
+                and sent before user_prompt
             
         Returns:
             Raw text response from LLM
@@ -79,8 +119,8 @@ class LLMClient:
             llm_with_tokens = self.llm.bind(max_tokens=max_tokens)
             
             messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=user_prompt)
+                SystemMessage(content=self._system_content(system_prompt, cache_system_prompt)),
+                HumanMessage(content=self._user_content(user_prompt, user_prefix))
             ]
             
             response = llm_with_tokens.invoke(messages)
@@ -96,6 +136,171 @@ class LLMClient:
             )
             raise
 
+    def stream_completion(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 1024,
+        cache_system_prompt: bool = False,
+        user_prefix: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Stream a chat completion, yielding text as it arrives.
+        
+        Args:
+            system_prompt: System message content
+            user_prompt: User message content
+            max_tokens: Maximum tokens to generate
+            cache_system_prompt: Mark the system prompt for Anthropic prompt caching
+            user_prefix: Optional leading user content block, marked for prompt caching
+                and sent before user_prompt
+            
+        Yields:
+            Text deltas from the LLM response
+        """
+        logger.debug(
+            f"Starting streaming LLM call: model={self.model}, max_tokens={max_tokens}",
+            correlation_id="API_CALL"
+        )
+
+        try:
+            llm_with_tokens = self.llm.bind(max_tokens=max_tokens)
+            
+            messages = [
+                SystemMessage(content=self._system_content(system_prompt, cache_system_prompt)),
+                HumanMessage(content=self._user_content(user_prompt, user_prefix))
+            ]
+            
+            for chunk in llm_with_tokens.stream(messages):
+                # Chunks carry either a plain string or a list of content block deltas
+                if isinstance(chunk.content, str):
+                    if chunk.content:
+                        yield chunk.content
+                    continue
+                for block in chunk.content:
+                    if isinstance(block, dict) and block.get("type") == "text" and block.get("text"):
+                        yield block["text"]
+            
+            logger.debug("Streaming LLM call successful", correlation_id="API_CALL")
+
+        except Exception as e:
+            logger.error(
+                f"Streaming LLM call failed: {type(e).__name__}: {e}",
+                correlation_id="API_CALL",
+                exc_info=True
+            )
+            raise
+
+    def batch_completion(
+        self,
+        requests: List[Tuple[str, str, str]],
+        max_tokens: int = 1024,
+        cache_system_prompt: bool = False,
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 60.0,
+        timeout: float = 3600.0,
+        correlation_id: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Send chat completions through the Message Batches API.
+        
+        Args:
+            requests: List of (custom_id, system_prompt, user_prompt) tuples
+            max_tokens: Maximum tokens to generate per request
+            cache_system_prompt: Mark system prompts for Anthropic prompt caching
+            poll_interval: Initial delay between status polls (seconds)
+            max_poll_interval: Upper bound for the poll backoff (seconds)
+            timeout: Maximum time to wait for the batch to end (seconds)
+            correlation_id: Request correlation ID
+            
+        Returns:
+            Mapping of custom_id to raw response text for succeeded requests
+        """
+        if not requests:
+            return {}
+
+        if self._batch_client is None:
+            # Only the batch path needs the raw SDK client
+            import anthropic
+            self._batch_client = anthropic.Anthropic(
+                api_key=config.ANTHROPIC_API_KEY,
+                max_retries=config.LLM_MAX_RETRIES,
+                timeout=config.LLM_TIMEOUT
+            )
+        batches = self._batch_client.messages.batches
+
+        batch = batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": self.model,
+                    "max_tokens": max_tokens,
+                    "temperature": self.temperature,
+                    "system": self._system_content(system_prompt, cache_system_prompt),
+                    "messages": [{"role": "user", "content": user_prompt}]
+                }
+            }
+            for custom_id, system_prompt, user_prompt in requests
+        ])
+        logger.debug(
+            f"Submitted message batch {batch.id} with {len(requests)} requests",
+            correlation_id=correlation_id
+        )
+
+        deadline = time.monotonic() + timeout
+        delay = poll_interval
+        while batch.processing_status != "ended":
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Message batch {batch.id} did not end within {timeout}s")
+            time.sleep(delay)
+            delay = min(delay * 2, max_poll_interval)
+            batch = batches.retrieve(batch.id)
+
+        responses = {}
+        for entry in batches.results(batch.id):
+            if entry.result.type != "succeeded":
+                logger.warning(
+                    f"Batch request {entry.custom_id} {entry.result.type}",
+                    correlation_id=correlation_id
+                )
+                continue
+            responses[entry.custom_id] = "".join(
+                block.text for block in entry.result.message.content if block.type == "text"
+            )
+
+        logger.debug(
+            f"Message batch {batch.id} ended: {len(responses)}/{len(requests)} succeeded",
+            correlation_id=correlation_id
+        )
+        return responses
+
+    @staticmethod
+    def _system_content(system_prompt: str, cache_system_prompt: bool) -> Any:
+        """
+        Build system message content, optionally as a cacheable text block.
+        
+        Anthropic caches everything up to the block carrying cache_control, so
+        repeated calls with the same static system prompt skip its prefill.
+        """
+        if not cache_system_prompt:
+            return system_prompt
+        return _cached_system_blocks(system_prompt)
+
+    @staticmethod
+    def _user_content(user_prompt: str, user_prefix: Optional[str]) -> Any:
+        """
+        Build user message content, with an optional cacheable leading block.
+        
+        The prefix carries its own cache_control breakpoint so calls that share
+        the same system prompt and prefix reuse it, while user_prompt stays uncached.
+        """
+        if not user_prefix:
+            return user_prompt
+        return [
+            {"type": "text", "text": user_prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": user_prompt}
+        ]
+
     def parse_json_response(
         self, 
         response: str, 
@@ -112,15 +317,22 @@ class LLMClient:
             Parsed JSON as dictionary
         """
         # extract JSON from code blocks first
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
+        json_match = JSON_FENCE_PATTERN.search(response)
         if json_match:
             json_str = json_match.group(1)
         else:
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            json_str = json_match.group(0) if json_match else response
+            # decode the first JSON object in place, without copying the response;
+            # later braces belong to nested values, so a failure here is a parse error
+            start = response.find("{")
+            if start != -1:
+                try:
+                    return JSON_DECODER.raw_decode(response, start)[0]
+                except json.JSONDecodeError:
+                    pass
+            json_str = response
 
         try:
-            return json.loads(json_str)
+            return json_utils.loads(json_str)
         except json.JSONDecodeError as e:
             error_msg = f"Failed to parse JSON response: {e}"
             logger.error(
@@ -144,28 +356,16 @@ class LLMClient:
         Returns:
             Dictionary with optimised_yaml, applied_fixes, and verification
         """
-        # Extract optimised YAML
-        yaml_match = re.search(
-            r'<optimised_yaml>\s*(.*?)\s*</optimised_yaml>', 
-            response, 
-            re.DOTALL
-        )
-        if not yaml_match:
+        optimised_yaml = extract_tagged_block(response, "optimised_yaml")
+        if optimised_yaml is None:
             logger.error(
                 "Failed to find <optimised_yaml> tags in response",
                 correlation_id=correlation_id
             )
             optimised_yaml = ""
-        else:
-            optimised_yaml = yaml_match.group(1).strip()
 
-        # Extract metadata JSON
-        metadata_match = re.search(
-            r'<metadata>\s*(.*?)\s*</metadata>', 
-            response, 
-            re.DOTALL
-        )
-        if not metadata_match:
+        metadata_text = extract_tagged_block(response, "metadata")
+        if metadata_text is None:
             logger.warning(
                 "Response missing <metadata> section, using defaults",
                 correlation_id=correlation_id
@@ -173,7 +373,7 @@ class LLMClient:
             metadata = {"applied_fixes": [], "verification": "No metadata provided"}
         else:
             try:
-                metadata = json.loads(metadata_match.group(1).strip())
+                metadata = json_utils.loads(metadata_text)
             except json.JSONDecodeError as e:
                 logger.warning(
                     f"Failed to parse metadata JSON: {e}",
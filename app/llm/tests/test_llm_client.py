@@ -0,0 +1,27 @@
+import json
+
+import pytest
+from unittest.mock import patch
+
+from app.llm.llm_client import LLMClient
+
+
+# Fixture
+@pytest.fixture
+def client():
+    with patch("app.llm.llm_client.ChatAnthropic"):
+        yield LLMClient(model="test-model")
+
+
+# Tests
+def test_parse_json_response_decodes_object_in_prose(client):
+    """Unfenced JSON is decoded from the first brace, ignoring surrounding text."""
+    response = 'Here you go: {"overall_risk": "high", "risks": [{"category": "deploy"}]} Done.'
+    assert client.parse_json_response(response) == {"overall_risk": "high", "risks": [{"category": "deploy"}]}
+
+
+def test_parse_json_response_rejects_truncated_object(client):
+    """A truncated response raises instead of returning a nested object."""
+    response = '{"overall_risk": "high", "risk_score": 9, "risks": [{"category": "deploy", "severity": "high"}, {"category": "secr'
+    with pytest.raises(json.JSONDecodeError):
+        client.parse_json_response(response)
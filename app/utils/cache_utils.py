@@ -0,0 +1,81 @@
+"""
+Result cache helpers - memoise deterministic component results by content digest
+"""
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def content_key(*parts: str) -> str:
+    """
+    Digest text inputs into a cache key.
+
+    Args:
+        parts: Text inputs the cached result depends on
+
+    Returns:
+        str: SHA-256 hex digest of the NUL-joined parts
+    """
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of results keyed by content digest, with hit/miss counters.
+
+    Values are deep-copied on the way in and out, so callers can mutate what
+    they get back without touching the cached copy. Caches of values every
+    caller treats as read-only (e.g. parsed documents) can skip the copies.
+    """
+
+    def __init__(self, max_entries: int = 128, copy_values: bool = True):
+        """
+        Initialise cache.
+
+        Args:
+            max_entries: Maximum number of results kept (0 or less disables the cache)
+            copy_values: Deep-copy values in and out (False shares them, read-only)
+        """
+        self.max_entries = max_entries
+        self.copy_values = copy_values
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the cached result, or None on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value) if self.copy_values else value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a copy of a result, evicting the least recently used one when full."""
+        if self.max_entries <= 0:
+            return
+        if self.copy_values:
+            value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss and size counts for monitoring."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        """Drop all results and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
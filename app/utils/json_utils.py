@@ -0,0 +1,46 @@
+"""
+JSON helpers - uses orjson when installed, falling back to the standard library
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Reused by the stdlib fallback; ensure_ascii=False matches orjson's UTF-8 output
+_PRETTY_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+
+def dumps_pretty(obj: Any) -> str:
+    """
+    Serialise obj as 2-space indented JSON.
+    
+    Args:
+        obj: JSON-serialisable object
+        
+    Returns:
+        str: Indented JSON text
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return _PRETTY_ENCODER.encode(obj)
+
+
+def loads(text: str) -> Any:
+    """
+    Parse JSON text.
+    
+    Args:
+        text: JSON document
+        
+    Returns:
+        Any: Parsed value
+        
+    Raises:
+        json.JSONDecodeError: If text is not valid JSON (orjson's error subclasses it)
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
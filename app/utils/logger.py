@@ -131,38 +131,43 @@ class ContextLogger:
     Usage:
         logger = ContextLogger(__name__, self.__class__.__name__)
         logger.info("Message", correlation_id="12345678")
+        logger.debug("Parsed %d jobs", count, correlation_id="12345678")
     """
     
     def __init__(self, name: str, class_name: str = "N/A"):
         self.logger = logging.getLogger(name)
         self.class_name = class_name
     
-    def _log(self, level: int, msg: str, correlation_id: Optional[str] = None, *args, **kwargs):
-        """Internal logging method with context."""
+    def _log(self, level: int, msg: str, args: tuple, correlation_id: Optional[str] = None, **kwargs):
+        """Internal logging method with context; msg % args is only formatted if the record is emitted."""
         extra = kwargs.pop('extra', {})
         extra['correlation_id'] = correlation_id or 'N/A'
         extra['class_name'] = self.class_name
         
         self.logger.log(level, msg, *args, extra=extra, **kwargs)
     
-    def debug(self, msg: str, correlation_id: Optional[str] = None, *args, **kwargs):
-        self._log(logging.DEBUG, msg, correlation_id, *args, **kwargs)
+    def isEnabledFor(self, level: int) -> bool:
+        """Whether a record at level would be emitted, to skip building costly log arguments."""
+        return self.logger.isEnabledFor(level)
     
-    def info(self, msg: str, correlation_id: Optional[str] = None, *args, **kwargs):
-        self._log(logging.INFO, msg, correlation_id, *args, **kwargs)
+    def debug(self, msg: str, *args, correlation_id: Optional[str] = None, **kwargs):
+        self._log(logging.DEBUG, msg, args, correlation_id, **kwargs)
     
-    def warning(self, msg: str, correlation_id: Optional[str] = None, *args, **kwargs):
-        self._log(logging.WARNING, msg, correlation_id, *args, **kwargs)
+    def info(self, msg: str, *args, correlation_id: Optional[str] = None, **kwargs):
+        self._log(logging.INFO, msg, args, correlation_id, **kwargs)
     
-    def error(self, msg: str, correlation_id: Optional[str] = None, *args, **kwargs):
-        self._log(logging.ERROR, msg, correlation_id, *args, **kwargs)
+    def warning(self, msg: str, *args, correlation_id: Optional[str] = None, **kwargs):
+        self._log(logging.WARNING, msg, args, correlation_id, **kwargs)
     
-    def exception(self, msg: str, correlation_id: Optional[str] = None, *args, **kwargs):
+    def error(self, msg: str, *args, correlation_id: Optional[str] = None, **kwargs):
+        self._log(logging.ERROR, msg, args, correlation_id, **kwargs)
+    
+    def exception(self, msg: str, *args, correlation_id: Optional[str] = None, **kwargs):
         kwargs['exc_info'] = True
-        self._log(logging.ERROR, msg, correlation_id, *args, **kwargs)
+        self._log(logging.ERROR, msg, args, correlation_id, **kwargs)
     
-    def critical(self, msg: str, correlation_id: Optional[str] = None, *args, **kwargs):
-        self._log(logging.CRITICAL, msg, correlation_id, *args, **kwargs)
+    def critical(self, msg: str, *args, correlation_id: Optional[str] = None, **kwargs):
+        self._log(logging.CRITICAL, msg, args, correlation_id, **kwargs)
 
 
 def get_logger(name: str, class_name: str = "N/A") -> ContextLogger:
@@ -0,0 +1,12 @@
+"""
+YAML helpers - uses the libyaml C loader when PyYAML was built with it
+"""
+try:
+    # libyaml bindings are much faster on large workflows
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+
+class UnsupportedStream(Exception):
+    """The YAML uses a feature (anchors, aliases, tags, merge keys, ...) left to the full loader."""